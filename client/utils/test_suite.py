@@ -1,13 +1,79 @@
 import logging
 from os import name
-from time import time
+import time
 from unittest import result
 from urllib import response 
 import requests
+import struct
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+
+def minimal_tflite() -> bytes:
+    """
+    Smallest valid TFLite model: one RELU on a float32 [1, 4] tensor
+
+    The flatbuffer is written front to back (vtable, table, then children),
+    so every reference is a forward offset. Fields are (kind, value) with
+    kind u32 / i32 / i8 / str / ints / tables; None leaves a field out.
+    """
+    buf = bytearray(8)
+    buf[4:8] = b"TFL3"
+
+    def align():
+        buf.extend(b"\0" * (-len(buf) % 4))
+
+    def table(fields):
+        align()
+        vtable = len(buf)
+        buf.extend(struct.pack("<HH", 4 + 2 * len(fields), 4 + 4 * len(fields)))
+        buf.extend(b"".join(struct.pack("<H", 4 + 4 * i if f else 0) for i, f in enumerate(fields)))
+        align()
+        pos = len(buf)
+        buf.extend(struct.pack("<i", pos - vtable) + b"\0" * 4 * len(fields))
+        for i, f in enumerate(fields):
+            if f:
+                slot = pos + 4 + 4 * i
+                kind, value = f
+                if kind in ("i8", "i32", "u32"):
+                    struct.pack_into({"i8": "<b", "i32": "<i", "u32": "<I"}[kind], buf, slot, value)
+                else:
+                    struct.pack_into("<I", buf, slot, child(kind, value) - slot)
+        return pos
+
+    def child(kind, value):
+        align()
+        pos = len(buf)
+        if kind == "str":
+            data = value.encode()
+            buf.extend(struct.pack("<I", len(data)) + data + b"\0")
+        elif kind == "ints":
+            buf.extend(struct.pack(f"<I{len(value)}i", len(value), *value))
+        else:
+            buf.extend(struct.pack("<I", len(value)) + b"\0" * 4 * len(value))
+            for i, fields in enumerate(value):
+                slot = pos + 4 + 4 * i
+                struct.pack_into("<I", buf, slot, table(fields) - slot)
+        return pos
+
+    tensor = lambda name: [("ints", [1, 4]), ("i8", 0), ("u32", 0), ("str", name)]
+    model = [
+        ("u32", 3),
+        ("tables", [[("i8", 19), None, ("i32", 1), ("i32", 19)]]),
+        ("tables", [[
+            ("tables", [tensor("input"), tensor("output")]),
+            ("ints", [0]), ("ints", [1]),
+            ("tables", [[("u32", 0), ("ints", [0]), ("ints", [1])]]),
+            ("str", "main"),
+        ]]),
+        ("str", "stmcast test model"),
+        ("tables", [[]]),
+    ]
+    struct.pack_into("<I", buf, 0, table(model))
+    return bytes(buf)
+
+
 class TestSuite:
     def __init__(self, SERVER_URL: str):
 
@@ -67,9 +133,9 @@ class TestSuite:
         """Test POST /upload"""
         self.print_test("POST /upload")
     
-        # Create dummy file
+        # Create dummy file (the server rejects files that are not valid TFLite)
         test_file = Path('./test_model.tflite') #TODO: make path dynamic
-        test_file.write_bytes(b'fake tflite data' * 100)
+        test_file.write_bytes(minimal_tflite())
     
         logger.info(f"Created test file: {test_file} ({test_file.stat().st_size} bytes)")
     
@@ -106,11 +172,20 @@ class TestSuite:
         result = response.json()
         logger.debug(f"Response:  {result}")
     
-        assert response.status_code == 200
+        assert response.status_code == 202
         assert result['success'] == True
     
+        # Generation runs as a background job, poll until it finishes
+        job = result
+        while job['status'] in ('queued', 'running'):
+            time.sleep(1)
+            job = requests.get(f"{self.SERVER_URL}/jobs/{result['job_id']}").json()
+            logger.debug(f"Job status: {job['status']}")
+    
+        assert job['status'] == 'succeeded'
+    
         logger.info("✅ PASSED")
-        self.job_id = result['job_id']
+        self.job_id = job['result']['name']
     
 
     def test_list_outputs(self):
@@ -1,5 +1,8 @@
+import os
+import re
 from pathlib import Path
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, field_validator, model_validator
 
 
 UPLOAD_DIR = Path('./uploads')
@@ -10,11 +13,132 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 
 CONFIG_DIR = Path('./config')
 CONFIG_DIR.mkdir(exist_ok=True)
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024          # 1 MiB
+MAX_UPLOAD_SIZE = 512 * 1024 * 1024      # 512 MiB
+
+# Generated code is cached per (model, target, network, toolchain, flags)
+CACHE_DIR = Path('./cache')
+CACHE_DIR.mkdir(exist_ok=True)
+COMPILE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024   # 2 GiB
+
+# Number of generate jobs running at the same time.
+# Each job compiles in its own scratch folder below WORKSPACE_DIR.
+COMPILE_WORKERS = os.cpu_count() or 1
+WORKSPACE_DIR = Path('./workspaces')
+
+# Live stedgeai output, one file per job
+JOB_LOG_DIR = Path('./logs/jobs')
+JOB_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# Kill a stedgeai run (and its children) after this many seconds
+STEDGEAI_TIMEOUT = 600
+
+# Admission control: generate requests over these budgets get 429 + Retry-After
+MAX_PENDING_JOBS = 4 * COMPILE_WORKERS          # queued jobs waiting for a worker
+MAX_JOBS_PER_CLIENT = 8                         # queued + running per source IP
+MIN_FREE_MEMORY = 1024 * 1024 * 1024            # 1 GiB, below that the queue only drains
+MAX_CPU_LOAD = 0.9                              # load per core, above that the queue only drains
+
+# Compiler backend: "stedgeai" (the real toolchain) or "simulated" for load
+# tests on machines without stedgeai, see utils/backends.py
+COMPILER_BACKEND = os.environ.get("STMCAST_BACKEND", "stedgeai")
+SIMULATED_BACKEND = {
+    "seconds": float(os.environ.get("STMCAST_SIM_SECONDS", "2.0")),                  # per run
+    "seconds_per_mib": float(os.environ.get("STMCAST_SIM_SECONDS_PER_MIB", "0.5")),  # of model
+    "cpu": float(os.environ.get("STMCAST_SIM_CPU", "0.25")),                         # busy share
+    "failure_rate": float(os.environ.get("STMCAST_SIM_FAILURE_RATE", "0.0")),
+}
+
+# Retention: least recently used uploads / outputs are removed once a
+# budget is exceeded, anything unused for RETENTION_MAX_AGE is removed too
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024 * 1024      # 10 GiB
+OUTPUT_MAX_BYTES = 5 * 1024 * 1024 * 1024       # 5 GiB
+RETENTION_MAX_AGE = 30 * 24 * 3600              # 30 days
+GC_INTERVAL = 15 * 60                           # seconds between GC runs
+
+# Target names end up in folder names (/outputs/<network>_<target>)
+TARGET_PATTERN = re.compile(r"^[a-z0-9_-]+$")
+
 # ============================================================================
 # MODELS
 # ============================================================================
 
+def normalize_target(target: str) -> str:
+    """Lowercased target name, ValueError unless it is a plain name"""
+    target = target.strip().lower()
+    if not TARGET_PATTERN.match(target):
+        raise ValueError(f"Invalid target '{target}', allowed are a-z, 0-9, '_' and '-'")
+    return target
+
+
 class GenerateRequest(BaseModel):
-    filename: str
+    filename: Optional[str] = None
+    digest: Optional[str] = None
     target: str = "stm32f4"
-    name: str = "network"
\ No newline at end of file
+    name: str = "network"
+
+    @field_validator("target")
+    @classmethod
+    def plain_target(cls, target):
+        return normalize_target(target)
+
+    @model_validator(mode="after")
+    def check_model_ref(self):
+        """Either filename or digest must identify the model"""
+        if not self.filename and not self.digest:
+            raise ValueError("Either 'filename' or 'digest' is required")
+        return self
+
+
+
+class BatchGenerateRequest(BaseModel):
+    models: List[Union[GenerateRequest, str]]
+    wait: bool = True
+    timeout: Optional[float] = None
+
+    @field_validator("models")
+    @classmethod
+    def digests_to_requests(cls, models):
+        """Plain strings in the list are model digests"""
+        return [GenerateRequest(digest=m) if isinstance(m, str) else m for m in models]
+
+
+class MultiTargetRequest(BaseModel):
+    filename: Optional[str] = None
+    digest: Optional[str] = None
+    targets: List[str]
+    name: str = "network"
+    wait: bool = True
+    timeout: Optional[float] = None
+
+    @field_validator("targets")
+    @classmethod
+    def unique_targets(cls, targets):
+        """At least one target, each listed once"""
+        targets = list(dict.fromkeys(normalize_target(t) for t in targets if t.strip()))
+        if not targets:
+            raise ValueError("At least one target is required")
+        return targets
+
+    @model_validator(mode="after")
+    def check_model_ref(self):
+        if not self.filename and not self.digest:
+            raise ValueError("Either 'filename' or 'digest' is required")
+        return self
+
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: Optional[int] = None
+    digest: Optional[str] = None
+
+
+class UploadCompleteRequest(BaseModel):
+    digest: Optional[str] = None
+
+
+class SyncRequest(BaseModel):
+    files: Dict[str, str] = {}          # filename -> sha256 of the client copy
+    compression: Optional[str] = None
@@ -1,16 +1,29 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
 import logging
 from pathlib import Path
 import threading
-from datetime import datetime
-from config import UPLOAD_DIR, OUTPUT_DIR, GenerateRequest
+import time
+from typing import Optional, Tuple
+from config import UPLOAD_DIR, OUTPUT_DIR, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE, GC_INTERVAL, RETENTION_MAX_AGE, TARGET_PATTERN, GenerateRequest, BatchGenerateRequest, MultiTargetRequest
+from config import UploadSessionRequest, UploadCompleteRequest, SyncRequest
 from discovery import discovery_server, get_local_ip
 from utils.format import print_request_start, print_request_end, print_ascii
 from utils.finder import FilesystemFinder
-from utils.stedgeai import STEdgeAI
-from utils.stedgeai import set_workspace_path
+from utils.upload import stream_multipart, safe_filename
+from utils.jobs import FINISHED, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+from utils.tflite import TFLiteError
+from utils.stedgeai import target_supported
+from utils.workspace import wait_for_publish
+from utils.admission import Overloaded
+from utils.http_cache import content_etag, etag_matches
+from utils.encoding import CompressionMiddleware, encoded_variant
+from utils.archive import COMPRESSIONS, available_compressions, compress_stream, directory_members, iter_tar
+from pipeline import TOOLCHAIN, MODEL_STORE, UPLOAD_SESSIONS, COMPILE_CACHE, CATALOG, JOB_QUEUE, JOB_STORE, EVENTS, RETENTION, ADMISSION, network_name, job_log_file, analyze_model, toolchain_probe, is_cached
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +65,10 @@ async def lifespan(app: FastAPI):
     finder_thread = threading.Thread(target=finder.find, daemon=True)
     finder_thread.start()
 
+    # Toolchain paths are cached from here on and reloaded when the finders update the config files;
+    # every (re)load probes the stedgeai version and targets in the background
+    TOOLCHAIN.state()
+
 #---- START WORKSPACE FINDER THREAD
     logger.info("🔎 Starting workspace_1_16_1 finder thread...")
     finder_work = FilesystemFinder(
@@ -62,6 +79,13 @@ async def lifespan(app: FastAPI):
     finder_thread = threading.Thread(target=finder_work.find, daemon=True)
     finder_thread.start()
 
+    # START JOB WORKERS (re-queues jobs interrupted by the last shutdown)
+    JOB_STORE.prune(RETENTION_MAX_AGE)
+    await JOB_QUEUE.start()
+
+    # START RETENTION GC
+    gc_task = asyncio.create_task(RETENTION.run(GC_INTERVAL), name="retention-gc")
+
     print(f"{80*'='}\n")
     print("STM Cast Auto Updater - Server\n")
     print("Hey there, Developer! The Server is ready to use :)")
@@ -73,6 +97,8 @@ async def lifespan(app: FastAPI):
     # ===== SHUTDOWN =====
     
     print("🛑 SERVER SHUTTING DOWN")
+    gc_task.cancel()
+    await JOB_QUEUE.stop()
     
 
 app = FastAPI(
@@ -80,6 +106,9 @@ app = FastAPI(
     lifespan=lifespan  
 )
 
+# gzip/zstd for JSON answers (listings get large)
+app.add_middleware(CompressionMiddleware)
+
 @app.get("/")
 def root():
     """Simplest endpoint"""
@@ -96,168 +125,446 @@ def root():
 
 
 @app.get("/debug")
-def debug():
-    """Debug endpoint - zeigt Dateien"""
+def debug(
+    limit: int = 100,
+    sort: str = "name",
+    order: str = "asc",
+    prefix: Optional[str] = None,
+    uploads_cursor: Optional[str] = None,
+    outputs_cursor: Optional[str] = None
+):
+    """
+    Debug endpoint - zeigt Dateien
+
+    Both lists are paginated separately (uploads_cursor / outputs_cursor)
+    and served from the SQLite indexes of the model store and the catalog.
+    """
     print_request_start("/debug", "GET")
     
-    # Liste uploads
-    uploads = list(UPLOAD_DIR.glob('*'))
-    logger.debug(f"🔵 Uploads folder: {UPLOAD_DIR. absolute()}")
-    logger.debug(f"🔵 Found {len(uploads)} files:")
-    for f in uploads:
-        logger.debug(f"   - {f.name} ({f.stat().st_size} bytes)")
-    
-    # Liste outputs
-    outputs = list(OUTPUT_DIR.glob('*'))
-    logger.debug(f"🔵 Outputs folder: {OUTPUT_DIR.absolute()}")
-    logger.debug(f"🔵 Found {len(outputs)} folders:")
-    for f in outputs: 
-        logger.debug(f"   - {f.name}")
+    try:
+        # Liste uploads
+        uploads = MODEL_STORE.page(sort, order, prefix, uploads_cursor, limit)
+        logger.debug(f"🔵 Uploads folder: {UPLOAD_DIR. absolute()}")
+        logger.debug(f"🔵 Found {uploads['total']} files:")
+        for f in uploads["items"]:
+            logger.debug(f"   - {f['name']} ({f['size']} bytes)")
+        
+        # Liste outputs (from the artifact catalog)
+        outputs = CATALOG.page(sort, order, prefix, outputs_cursor, limit)
+        logger.debug(f"🔵 Outputs folder: {OUTPUT_DIR.absolute()}")
+        logger.debug(f"🔵 Found {outputs['total']} folders:")
+        for f in outputs["items"]: 
+            logger.debug(f"   - {f['name']}")
+    finally:
+        print_request_end("/debug")
     
     response = {
-        "uploads": [f.name for f in uploads],
-        "outputs": [f.name for f in outputs]
+        "uploads": [f["name"] for f in uploads["items"]],
+        "outputs": [f["name"] for f in outputs["items"]],
+        "uploads_page": {"total": uploads["total"], "next_cursor": uploads["next_cursor"]},
+        "outputs_page": {"total": outputs["total"], "next_cursor": outputs["next_cursor"]}
     }
     
     logger.debug(f"🔵 Response:  {response}")
-    print_request_end("/debug")
     return response
 
 
 @app.post("/upload")
-async def upload(file: UploadFile = File(...)):
-    """Upload mit ALLEN Debug Prints"""
+async def upload(request: Request):
+    """
+    Upload mit ALLEN Debug Prints
+
+    Expects multipart/form-data with the model in the "file" field. The
+    body is parsed while it streams in, not spooled by FastAPI first.
+    """
     print_request_start("/upload", "POST")
     
     logger.info(f"🔵 Function: upload()")
-    logger.debug(f"🔵 Parameter 'file' type: {type(file)}")
-    logger.debug(f"🔵 file.filename: {file.filename}")
-    logger.debug(f"🔵 file.content_type: {file.content_type}")
+    logger.debug(f"🔵 content-type: {request.headers.get('content-type')}")
     
-    # Read content
-    logger.debug(f"🔵 Reading file content...")
-    content = await file.read()
-    logger.debug(f"🔵 Read {len(content)} bytes")
+    # Reject oversized bodies before touching the payload
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        logger.error(f"❌ Content-Length {content_length} exceeds {MAX_UPLOAD_SIZE} bytes")
+        print_request_end("/upload")
+        raise HTTPException(status_code=413, detail=f"File too large (limit {MAX_UPLOAD_SIZE} bytes)")
     
-    # Generate filename
+    # Stream to temp file, hash on the fly, move into the model store
+    logger.debug(f"🔵 Streaming file content in {UPLOAD_CHUNK_SIZE} byte chunks...")
+    try:
+        filename, stored = await stream_multipart(request, "file", MODEL_STORE.tmp_dir, MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE)
+        try:
+            filename = safe_filename(filename)
+        except HTTPException:
+            stored.path.unlink(missing_ok=True)
+            raise
+        logger.debug(f"🔵 filename: {filename}")
+        
+        # Pre-flight check of the flatbuffer, bad models never reach stedgeai
+        try:
+            model = await run_in_threadpool(MODEL_STORE.check, stored.path, stored.sha256)
+        except TFLiteError as e:
+            stored.path.unlink(missing_ok=True)
+            logger.error(f"❌ Invalid model {filename}: {e}")
+            raise HTTPException(status_code=422, detail=f"Invalid TFLite model: {e}")
+        
+        duplicate = await run_in_threadpool(MODEL_STORE.add, stored.path, stored.sha256, filename)
+    finally:
+        print_request_end("/upload")
     
-    logger.debug(f"🔵 Generated unique filename: {file.filename}")
-    
-    # Build path
-    filepath = UPLOAD_DIR / file.filename
+    filepath = MODEL_STORE.blob_path(stored.sha256)
+    RETENTION.touch(filepath)
     logger.debug(f"🔵 Full path: {filepath}")
-    logger.debug(f"🔵 Absolute path: {filepath.absolute()}")
-    
-    # Save
-    logger.debug(f"🔵 Writing to disk...")
-    filepath.write_bytes(content)
-    saved_size = filepath.stat().st_size
-    logger.info(f"🔵 Saved!  File size: {saved_size} bytes")
+    logger.info(f"🔵 Saved!  File size: {stored.size} bytes, sha256: {stored.sha256}")
     
     # Response
     response = {
-        "filename": file.filename,
-        "size": len(content),
-        "path": str(filepath.absolute())
+        "filename": filename,
+        "digest": stored.sha256,
+        "size": stored.size,
+        "deduplicated": duplicate,
+        "path": str(filepath.absolute()),
+        "model": model
     }
     logger.debug(f"🔵 Response: {response}")
     
-    print_request_end("/upload")
     return response
 
 
-@app.post("/generate")
-def generate(request: GenerateRequest):
-    """Generate mit ALLEN Debug Prints"""
-    print_request_start("/generate", "POST")
+@app.post("/uploads", status_code=201)
+def create_upload(request: UploadSessionRequest):
+    """Start a resumable upload session"""
+    print_request_start("/uploads", "POST")
     
-    logger.info(f"🔵 Function: generate()")
-    logger.debug(f"🔵 Parameter 'request' type: {type(request)}")
+    logger.info(f"🔵 Function: create_upload()")
     logger.debug(f"🔵 request object: {request}")
-    logger.debug(f"🔵 request.filename: {request.filename}")
-    logger.debug(f"🔵 request.target: {request.target}")
-    logger.debug(f"🔵 request.name: {request.name}")
     
-    # Pydantic model to dict
-    logger.debug(f"🔵 Converting to dict...")
-    data = request.model_dump()
-    logger.debug(f"🔵 As dict: {data}")
-      
-    # Build model path
-    logger.debug(f"🔵 Building model path...")
-    logger.debug(f"   UPLOAD_DIR = {UPLOAD_DIR}")
-    logger.debug(f"   request.filename = {request.filename}")
+    filename = safe_filename(request.filename)
+    try:
+        session = UPLOAD_SESSIONS.create(filename, size=request.size, digest=request.digest)
+    finally:
+        print_request_end("/uploads")
     
-    model_path = UPLOAD_DIR / request.filename
-    logger.debug(f"🔵 model_path = {model_path}")
-    logger.debug(f"🔵 Checking if exists...")
+    # Nothing to send if the server already has this exact model
+    exists = bool(request.digest) and MODEL_STORE.has(request.digest)
     
-    if not model_path.exists():
-        logger.error(f"❌ File NOT found!")
-        logger.error(f"   Available files:")
-        for f in UPLOAD_DIR.glob('*'):
-            logger.error(f"   - {f.name}")
-        print_request_end("/generate")
-        raise HTTPException(status_code=404, detail=f"Model not found:  {request.filename}")
+    response = {
+        **session,
+        "exists": exists,
+        "upload_url": f"/uploads/{session['upload_id']}"
+    }
+    logger.debug(f"🔵 Response: {response}")
     
-    logger.info(f"✅ File found!")
+    return response
+
+
+@app.head("/uploads/{upload_id}")
+def upload_offset(upload_id: str):
+    """Committed offset of a session in the Upload-Offset header"""
+    session = UPLOAD_SESSIONS.status(upload_id)
+    return Response(status_code=200, headers={"Upload-Offset": str(session["offset"])})
+
+
+@app.get("/uploads/{upload_id}")
+def upload_status(upload_id: str):
+    """Session details including the committed offset"""
+    print_request_start(f"/uploads/{upload_id}", "GET")
     
-    filename = request.filename
+    try:
+        response = UPLOAD_SESSIONS.status(upload_id)
+    finally:
+        print_request_end(f"/uploads/{upload_id}")
     
-    if "temperature" in filename.lower():
-        prefix = "err_seq_"
+    logger.debug(f"🔵 Response: {response}")
+    return response
 
-    elif "humidity" in filename.lower():
-        prefix = "hum_seq_"
-    else:
-        prefix = "nn_"
+
+@app.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Append the raw request body to a session at `offset`"""
+    print_request_start(f"/uploads/{upload_id}", "PUT")
+    
+    logger.debug(f"🔵 upload_id: {upload_id}, offset: {offset}")
     
-    logger.debug(f"🔵 Extracting number from filename: {request.filename}")
-    nn_number = ''.join(filter(str.isdigit, request.filename))
-    logger.debug(f"🔵 Extracted number: '{nn_number}'")
-    nn_name = f"{prefix}{nn_number}"
+    try:
+        committed = await UPLOAD_SESSIONS.append(upload_id, offset, request.stream(), UPLOAD_CHUNK_SIZE)
+    finally:
+        print_request_end(f"/uploads/{upload_id}")
+    
+    logger.debug(f"🔵 Committed offset: {committed}")
+    return JSONResponse(
+        {"upload_id": upload_id, "offset": committed},
+        headers={"Upload-Offset": str(committed)}
+    )
 
-    # Create job
-    job_id = datetime.now().strftime('%Y%m%d_%H%M%S')
-    logger.debug(f"🔵 Generated job_id: {job_id}")
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, request: UploadCompleteRequest):
+    """Verify the digest and move the finished upload into the model store"""
+    print_request_start(f"/uploads/{upload_id}/complete", "POST")
+    
+    try:
+        response = await UPLOAD_SESSIONS.complete(upload_id, digest=request.digest)
+    finally:
+        print_request_end(f"/uploads/{upload_id}/complete")
     
-    output_dir = OUTPUT_DIR / nn_name
-    logger.debug(f"🔵 output_dir:  {output_dir}")
-    logger.debug(f"🔵 Creating directory...")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"✅ Directory created!")
+    RETENTION.touch(MODEL_STORE.blob_path(response['digest']))
+    logger.info(f"🔵 Saved!  File size: {response['size']} bytes, sha256: {response['digest']}")
+    logger.debug(f"🔵 Response: {response}")
+    return response
+
+
+@app.delete("/uploads/{upload_id}")
+def abort_upload(upload_id: str):
+    """Abort a session and delete its partial data"""
+    print_request_start(f"/uploads/{upload_id}", "DELETE")
+    
+    try:
+        UPLOAD_SESSIONS.abort(upload_id)
+    finally:
+        print_request_end(f"/uploads/{upload_id}")
+    
+    return {"upload_id": upload_id, "aborted": True}
 
-    x_cube_ai = set_workspace_path()
-    x_cube_ai_app = x_cube_ai /"X-CUBE-AI"/"App"
-    logger.debug(f"🔵 workspace path:  {x_cube_ai_app}")
 
-    if not nn_number:
-        logger.warning(f"⚠️ No number found in filename '{request.filename}', using default '0'")
-        nn_number = "0"
+@app.head("/models/{digest}")
+def model_exists(digest: str):
+    """Cheap existence check so clients can skip re-uploading a model"""
+    if not MODEL_STORE.has(digest):
+        return Response(status_code=404)
     
+    size = MODEL_STORE.blob_path(digest).stat().st_size
+    return Response(status_code=200, headers={"content-length": str(size)})
+
+
+@app.get("/models/{digest}")
+def model_info(digest: str):
+    """Stored model metadata"""
+    print_request_start(f"/models/{digest}", "GET")
     
+    if not MODEL_STORE.has(digest):
+        print_request_end(f"/models/{digest}")
+        raise HTTPException(status_code=404, detail=f"Model not found: {digest}")
+    
+    response = {
+        "digest": digest,
+        "size": MODEL_STORE.blob_path(digest).stat().st_size,
+        "names": MODEL_STORE.names_for(digest),
+        "model": MODEL_STORE.metadata(digest),
+        "rejected": MODEL_STORE.rejected(digest)
+    }
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end(f"/models/{digest}")
+    return response
+
+
+@app.get("/models/{digest}/report")
+async def model_report(digest: str, target: str = "stm32f4"):
+    """
+    Footprint of a model (RAM, flash, MACC) from stedgeai analyze
+
+    Computed once per (digest, target, toolchain) and cached, so "will it
+    fit" questions do not need a full generate.
+    """
+    print_request_start(f"/models/{digest}/report", "GET")
+    
+    logger.info(f"🔵 Function: model_report()")
+    logger.debug(f"🔵 digest: {digest}, target: {target}")
+    target = target.strip().lower()
+    
+    try:
+        if not MODEL_STORE.has(digest):
+            raise HTTPException(status_code=404, detail=f"Model not found: {digest}")
+        _check_target(target)
+        
+        try:
+            report, cached = await analyze_model(digest, target)
+        except FileNotFoundError as e:
+            # stedgeai not configured (yet), see GET /toolchain
+            logger.error(f"❌ {e}")
+            raise HTTPException(status_code=503, detail=str(e))
+        except RuntimeError as e:
+            logger.error(f"❌ {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        print_request_end(f"/models/{digest}/report")
+    
+    response = {
+        "digest": digest,
+        "target": target,
+        "cached": cached,
+        "report": report
+    }
+    logger.debug(f"🔵 Response: {response}")
+    return response
+
+
+def _check_target(target: str):
+    """
+    Reject targets the probed stedgeai does not support, without spawning it
+
+    Listed families cover their series (see target_supported); every
+    target is accepted while the toolchain is not probed yet or its help
+    text listed none.
+
+    Raises:
+        HTTPException: 400 for an invalid or unsupported target
+    """
+    if not TARGET_PATTERN.match(target):
+        raise HTTPException(status_code=400, detail=f"Invalid target '{target}', allowed are a-z, 0-9, '_' and '-'")
+    probe = toolchain_probe()
+    if probe and not target_supported(target, probe["targets"]):
+        logger.error(f"❌ Target {target} not supported by stedgeai {probe['version']}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Target '{target}' not supported by stedgeai {probe['version']}, "
+                   f"supported: {', '.join(probe['targets'])}"
+        )
+
+
+async def _job_params(request: GenerateRequest) -> dict:
+    """
+    Resolve a GenerateRequest into job parameters
+
+    Raises:
+        HTTPException: 400 for an unsupported target, 404 if the model is
+            not in the store, 422 if it is known (or found) to be invalid
+    """
+    _check_target(request.target)
+
+    logger.debug(f"🔵 Resolving model...")
+    logger.debug(f"   request.filename = {request.filename}")
+    logger.debug(f"   request.digest = {request.digest}")
+    
+    digest = request.digest or MODEL_STORE.resolve(request.filename)
+    logger.debug(f"🔵 digest = {digest}")
+    
+    if not digest or not MODEL_STORE.has(digest):
+        logger.error(f"❌ Model NOT found!")
+        logger.error(f"   Available files:")
+        for name in MODEL_STORE.names():
+            logger.error(f"   - {name}")
+        raise HTTPException(status_code=404, detail=f"Model not found:  {request.filename or request.digest}")
+    
+    logger.info(f"✅ File found!")
+    
+    # Fail fast on known-bad digests; blobs stored before validation existed are checked here once
+    try:
+        await asyncio.to_thread(MODEL_STORE.check, MODEL_STORE.blob_path(digest), digest)
+    except TFLiteError as e:
+        logger.error(f"❌ Invalid model {digest[:12]}: {e}")
+        raise HTTPException(status_code=422, detail=f"Invalid TFLite model: {e}")
+    
+    # Filename drives the network name; a digest-only request uses a known name
+    if request.filename and request.digest:
+        MODEL_STORE.link(request.filename, digest)
+    known_names = MODEL_STORE.names_for(digest)
+    filename = request.filename or (known_names[0] if known_names else digest)
+    
+    nn_name = network_name(filename)
     logger.debug(f"🔵 Generated network name: {nn_name}")
     
-    stedgeai = STEdgeAI(model_file=model_path, network=nn_name, output_dir=x_cube_ai_app)
+    return {
+        "digest": digest,
+        "filename": filename,
+        "target": request.target,
+        "name": nn_name,
+    }
+
+
+def _admit(http: Request, params: list, partial: bool = False) -> Tuple[list, Optional[Overloaded]]:
+    """
+    Admission control for the jobs a request is about to submit
+
+    Tags each job with the client's address (for the per-client cap).
+    Compile cache hits do not take a worker and are always admitted.
+    With partial=True (batches) the jobs that fit are admitted and the
+    refused ones are returned, 429 is only raised if none fit.
+
+    Returns:
+        (refused params, why they were refused)
+
+    Raises:
+        HTTPException: 429 with Retry-After if the server is over budget,
+            413 if the jobs can never be admitted together
+    """
+    client = http.client.host if http.client else "unknown"
+    try:
+        refused, overloaded = ADMISSION.admit(client, [p for p in params if not is_cached(p)], partial=partial)
+    except Overloaded as e:
+        overloaded, refused = e, params
+    if overloaded is not None and overloaded.retry_after is None:
+        raise HTTPException(status_code=413, detail=overloaded.reason)
+    if refused and len(refused) == len(params):
+        raise HTTPException(status_code=429, detail=overloaded.reason,
+                            headers={"Retry-After": str(overloaded.retry_after)})
+    for p in params:
+        p["client"] = client
+    return refused, overloaded
+
+
+def _submit(params: dict):
+    """Submit a job; compile cache hits start right away instead of queueing"""
+    return JOB_QUEUE.submit(params, inline=is_cached(params))
+
+
+def _submit_entries(entries, refused: list, overloaded: Optional[Overloaded]):
+    """Submit the admitted "params" of manifest entries, mark the refused ones retryable"""
+    refused_ids = {id(p) for p in refused}
+    for entry in entries:
+        if "params" not in entry:
+            continue
+        params = entry.pop("params")
+        if id(params) in refused_ids:
+            entry["error"] = overloaded.reason
+            entry["retry_after"] = overloaded.retry_after
+            continue
+        entry["job"], entry["coalesced"] = _submit(params)
+
+
+def _artifact_urls(result: Optional[dict]) -> list:
+    """Download links for the files a finished job produced"""
+    if not result:
+        return []
+    name = result["name"]
+    return [
+        {"name": f, "download_url": f"/download/{name}/{f}"}
+        for f in result["files"]
+    ]
+
+
+@app.post("/generate", status_code=202)
+async def generate(request: GenerateRequest, http: Request):
+    """Queue a generate job and return its id immediately (429 if over budget)"""
+    print_request_start("/generate", "POST")
     
-    # Run stedgeai generate
-    logger.debug(f"🔵 Running stedgeai generate...")
-    logger.debug(f"🔵 Output will be saved to: {output_dir}")
-    success = stedgeai.generate_model()
+    logger.info(f"🔵 Function: generate()")
+    logger.debug(f"🔵 Parameter 'request' type: {type(request)}")
+    logger.debug(f"🔵 request object: {request}")
+    logger.debug(f"🔵 request.filename: {request.filename}")
+    logger.debug(f"🔵 request.target: {request.target}")
+    logger.debug(f"🔵 request.name: {request.name}")
     
-    if not success:
-        logger.error(f"❌ stedgeai generation failed!")
+    try:
+        params = await _job_params(request)
+        _admit(http, [params])
+    except HTTPException:
         print_request_end("/generate")
-        raise HTTPException(status_code=500, detail="Model generation failed")
+        raise
     
-    logger.info(f"✅ stedgeai generation completed!")
-    logger.info(f"✅ Files saved to {output_dir}")
+    # Create job (or join an identical one already in flight)
+    job, attached = _submit(params)
+    logger.debug(f"🔵 Job id: {job.id} (attached: {attached})")
     
     # Response
     response = {
         "success": True,
-        "name": nn_name,
-        "output_dir": str(output_dir)
+        "job_id": job.id,
+        "status": job.status,
+        "coalesced": attached,
+        "name": params["name"],
+        "status_url": f"/jobs/{job.id}"
     }
     logger.debug(f"🔵 Response: {response}")
     
@@ -265,20 +572,391 @@ def generate(request: GenerateRequest):
     return response
 
 
+async def _wait_jobs(jobs: list, timeout: Optional[float]):
+    """Wait until all jobs finished or the timeout hit"""
+    if not jobs:
+        return
+    try:
+        await asyncio.wait_for(asyncio.gather(*[job.done.wait() for job in jobs]), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Timeout after {timeout}s, returning partial manifest")
+
+
+@app.post("/generate/batch")
+async def generate_batch(request: BatchGenerateRequest, http: Request):
+    """
+    Queue many models at once and return one manifest
+
+    All jobs go to the shared worker pool, so they compile concurrently.
+    With wait=true the response is sent once every job has finished
+    (or the timeout hit); otherwise it returns right after queueing.
+    Models over the admission budget are listed as rejected with
+    retryable=true and a retry_after; 429 only if none was admitted.
+    """
+    print_request_start("/generate/batch", "POST")
+    
+    logger.info(f"🔵 Function: generate_batch()")
+    logger.debug(f"🔵 {len(request.models)} models, wait={request.wait}")
+    
+    started = time.time()
+    entries = []
+    for index, model in enumerate(request.models):
+        try:
+            params = await _job_params(model)
+        except HTTPException as e:
+            entries.append({"index": index, "job": None, "error": e.detail})
+            continue
+        entries.append({"index": index, "params": params, "job": None, "error": None})
+    
+    try:
+        refused, overloaded = _admit(http, [e["params"] for e in entries if "params" in e], partial=True)
+    except HTTPException:
+        print_request_end("/generate/batch")
+        raise
+    _submit_entries(entries, refused, overloaded)
+    
+    # The same job may appear several times if the batch repeats a model
+    jobs = list({e["job"].id: e["job"] for e in entries if e["job"] is not None}.values())
+    if request.wait:
+        await _wait_jobs(jobs, request.timeout)
+    
+    # Build manifest
+    items = []
+    for entry in entries:
+        job = entry["job"]
+        if job is None:
+            items.append({"index": entry["index"], "status": "rejected", "error": entry["error"],
+                          "retryable": "retry_after" in entry, "retry_after": entry.get("retry_after")})
+            continue
+        
+        info = job.to_dict()
+        items.append({
+            "index": entry["index"],
+            "job_id": job.id,
+            "status": job.status,
+            "coalesced": entry["coalesced"],
+            "name": job.params["name"],
+            "timings": info["timings"],
+            "cached": job.result["cached"] if job.result else None,
+            "error": job.error,
+            "files": _artifact_urls(job.result),
+        })
+    
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    
+    response = {
+        "total": len(items),
+        "counts": counts,
+        "wall_s": round(time.time() - started, 3),
+        "items": items
+    }
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end("/generate/batch")
+    return response
+
+
+@app.post("/generate/targets")
+async def generate_targets(request: MultiTargetRequest, http: Request):
+    """
+    Compile one model for several targets at once and return one manifest
+
+    Every target is its own job in its own workspace slot, so the builds
+    run concurrently and the whole request takes about as long as the
+    slowest target. Each target publishes to /outputs/<network>_<target>
+    (the BSC project is not touched); the manifest lists the artifacts and
+    the footprint stedgeai reported for each target. Targets over the
+    admission budget are rejected with retryable=true, like in a batch.
+    """
+    print_request_start("/generate/targets", "POST")
+    
+    logger.info(f"🔵 Function: generate_targets()")
+    logger.debug(f"🔵 targets: {request.targets}, wait={request.wait}")
+    
+    started = time.time()
+    entries = {}
+    try:
+        for target in request.targets:
+            model = GenerateRequest(filename=request.filename, digest=request.digest, target=target, name=request.name)
+            try:
+                params = await _job_params(model)
+            except HTTPException as e:
+                # Missing or invalid model fails the whole request, a bad target only its entry
+                if e.status_code != 400:
+                    raise
+                entries[target] = {"job": None, "error": e.detail}
+                continue
+            params["output"] = f"{params['name']}_{target}"
+            params["project"] = False
+            entries[target] = {"params": params, "job": None, "error": None}
+        
+        refused, overloaded = _admit(http, [e["params"] for e in entries.values() if "params" in e], partial=True)
+        _submit_entries(entries.values(), refused, overloaded)
+    
+        if request.wait:
+            await _wait_jobs([e["job"] for e in entries.values() if e["job"] is not None], request.timeout)
+    
+        targets = {}
+        for target, entry in entries.items():
+            job = entry["job"]
+            if job is None:
+                targets[target] = {"status": "rejected", "error": entry["error"],
+                                   "retryable": "retry_after" in entry, "retry_after": entry.get("retry_after")}
+                continue
+        
+            result = job.result or {}
+            targets[target] = {
+                "job_id": job.id,
+                "status": job.status,
+                "coalesced": entry["coalesced"],
+                "name": result.get("name", job.params["output"]),
+                "timings": job.to_dict()["timings"],
+                "cached": result.get("cached"),
+                "footprint": result.get("footprint"),
+                "error": job.error,
+                "files": _artifact_urls(job.result),
+            }
+    
+        counts = {}
+        for item in targets.values():
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+    
+        digest = next((e["job"].params["digest"] for e in entries.values() if e["job"] is not None), request.digest)
+        response = {
+            "digest": digest,
+            "counts": counts,
+            "wall_s": round(time.time() - started, 3),
+            "targets": targets
+        }
+        logger.debug(f"🔵 Response: {response}")
+    finally:
+        print_request_end("/generate/targets")
+    return response
+
+
+@app.get("/jobs")
+def list_jobs(
+    status: Optional[str] = None,
+    since: Optional[float] = None,
+    digest: Optional[str] = None,
+    limit: int = 100
+):
+    """
+    Job history from the job store, newest first
+
+    since is a Unix timestamp; a negative value means "seconds ago"
+    (e.g. since=-3600 for the last hour).
+    """
+    print_request_start("/jobs", "GET")
+    
+    if status and status not in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED):
+        print_request_end("/jobs")
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    if since is not None and since < 0:
+        since = time.time() + since
+    
+    jobs = JOB_STORE.query(status=status, since=since, digest=digest, limit=limit)
+    response = {"count": len(jobs), "jobs": jobs}
+    logger.debug(f"🔵 {len(jobs)} jobs (status={status}, since={since}, digest={digest})")
+    
+    print_request_end("/jobs")
+    return response
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Status, timings and result paths of a generate job"""
+    print_request_start(f"/jobs/{job_id}", "GET")
+    
+    # Live jobs from the queue, older ones from the job store
+    job = JOB_QUEUE.get(job_id)
+    response = job.to_dict() if job is not None else JOB_STORE.get(job_id)
+    if response is None:
+        logger.error(f"❌ Job NOT found!")
+        print_request_end(f"/jobs/{job_id}")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end(f"/jobs/{job_id}")
+    return response
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (kills the stedgeai process)"""
+    print_request_start(f"/jobs/{job_id}", "DELETE")
+    
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        logger.error(f"❌ Job NOT found!")
+        print_request_end(f"/jobs/{job_id}")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    if job.status in FINISHED:
+        print_request_end(f"/jobs/{job_id}")
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    
+    JOB_QUEUE.cancel(job_id)
+    response = job.to_dict()
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end(f"/jobs/{job_id}")
+    return response
+
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of one job
+
+    Events:
+        state     job dict on every status change (queued, running, ...)
+        log       {"stream", "line"} for each line stedgeai prints
+        manifest  final status and download links, then the stream ends
+
+    Reconnecting clients send Last-Event-ID and only get what they missed.
+    """
+    print_request_start(f"/jobs/{job_id}/events", "GET")
+    
+    job = JOB_QUEUE.get(job_id)
+    stored = JOB_STORE.get(job_id) if job is None else None
+    if job is None and stored is None:
+        logger.error(f"❌ Job NOT found!")
+        print_request_end(f"/jobs/{job_id}/events")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    last_event_id = request.headers.get("last-event-id", "")
+    last_id = int(last_event_id) if last_event_id.isdigit() else 0
+    logger.debug(f"🔵 Streaming events of {job_id} from id {last_id}")
+    
+    async def stream():
+        # Jobs from before a restart have no live events, only their final state
+        if job is not None and (EVENTS.known(job_id) or job.status not in FINISHED):
+            async for message in EVENTS.stream(job_id, last_id=last_id):
+                yield message
+        
+        info = job.to_dict() if job is not None else stored
+        manifest = {
+            "job_id": job_id,
+            "status": info["status"],
+            "error": info["error"],
+            "files": _artifact_urls(info["result"]),
+        }
+        yield f"event: manifest\ndata: {json.dumps(manifest)}\n\n"
+    
+    print_request_end(f"/jobs/{job_id}/events")
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/jobs/{job_id}/log")
+def job_log(job_id: str):
+    """stedgeai output of a job, also while it is still running"""
+    print_request_start(f"/jobs/{job_id}/log", "GET")
+    
+    log_file = job_log_file(job_id)
+    if not log_file.exists():
+        print_request_end(f"/jobs/{job_id}/log")
+        if JOB_QUEUE.get(job_id) is None:
+            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+        return PlainTextResponse("")
+    
+    print_request_end(f"/jobs/{job_id}/log")
+    return FileResponse(log_file, media_type="text/plain")
+
+
+@app.get("/cache")
+def cache_stats():
+    """Compile cache hit/miss counters and size"""
+    print_request_start("/cache", "GET")
+    
+    response = {**COMPILE_CACHE.stats(), "queue": JOB_QUEUE.stats()}
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end("/cache")
+    return response
+
+
+@app.get("/toolchain")
+def toolchain_state():
+    """Resolved stedgeai / BSC paths, when the config was last (re)loaded and the probed version/targets"""
+    print_request_start("/toolchain", "GET")
+    
+    response = {**TOOLCHAIN.state(), "probe": toolchain_probe()}
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end("/toolchain")
+    return response
+
+
+@app.get("/admission")
+def admission_stats():
+    """Admission limits, current queue depth / host load and refusal counts"""
+    print_request_start("/admission", "GET")
+    
+    response = ADMISSION.stats()
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end("/admission")
+    return response
+
+
+@app.get("/gc")
+def gc_stats():
+    """Retention budgets and the report of the last GC pass"""
+    print_request_start("/gc", "GET")
+    
+    response = RETENTION.stats()
+    logger.debug(f"🔵 Response: {response}")
+    
+    print_request_end("/gc")
+    return response
+
+
+@app.post("/gc")
+async def gc_run():
+    """Run a GC pass now and return what it reclaimed"""
+    print_request_start("/gc", "POST")
+    
+    try:
+        response = await run_in_threadpool(RETENTION.collect)
+    finally:
+        print_request_end("/gc")
+    
+    logger.debug(f"🔵 Response: {response}")
+    return response
+
+
 @app.get("/outputs/{job_id}")
-def list_outputs(job_id: str):
-    """List files mit Debug"""
+def list_outputs(
+    job_id: str,
+    limit: int = 100,
+    sort: str = "name",
+    order: str = "asc",
+    prefix: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """List files mit Debug (paginated, see next_cursor)"""
     print_request_start(f"/outputs/{job_id}", "GET")
     
     logger.info(f"🔵 Function: list_outputs()")
     logger.debug(f"🔵 Path parameter 'job_id': {job_id} (type: {type(job_id)})")
     
-    # Build path
-    output_dir = OUTPUT_DIR / job_id
-    logger.debug(f"🔵 output_dir:  {output_dir}")
-    logger.debug(f"🔵 Checking if exists...")
+    # Look up in the artifact catalog
+    logger.debug(f"🔵 Catalog lookup for {job_id}...")
+    try:
+        page = CATALOG.list_page(safe_filename(job_id), sort, order, prefix, cursor, limit)
+    except HTTPException:
+        print_request_end(f"/outputs/{job_id}")
+        raise
     
-    if not output_dir.exists():
+    if page is None:
         logger.error(f"❌ Directory NOT found!")
         print_request_end(f"/outputs/{job_id}")
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
@@ -287,20 +965,23 @@ def list_outputs(job_id: str):
     
     # List files
     logger.info(f"🔵 Listing files...")
+    
     files = []
-    for f in output_dir.iterdir():
-        if f.is_file():
-            file_info = {
-                'name': f.name,
-                'size': f.stat().st_size,
-                'download_url': f'/download/{job_id}/{f.name}'
-            }
-            files. append(file_info)
-            logger.info(f"   - {f.name} ({f.stat().st_size} bytes)")
+    for f in page["items"]:
+        file_info = {
+            'name': f['name'],
+            'size': f['size'],
+            'sha256': f['sha256'],
+            'download_url': f'/download/{job_id}/{f["name"]}'
+        }
+        files.append(file_info)
+        logger.info(f"   - {f['name']} ({f['size']} bytes)")
     
     response = {
         'job_id': job_id,
-        'files': files
+        'files': files,
+        'total': page['total'],
+        'next_cursor': page['next_cursor']
     }
     logger.debug(f"🔵 Response: {response}")
     
@@ -308,9 +989,126 @@ def list_outputs(job_id: str):
     return response
 
 
+@app.get("/download/{job_id}.tar")
+def download_archive(job_id: str, compression: Optional[str] = None):
+    """
+    Whole output directory as one tar stream
+
+    The archive is built while it is sent, without a temp file.
+    Optional ?compression=gzip|zstd compresses the stream on the fly.
+    """
+    print_request_start(f"/download/{job_id}.tar", "GET")
+    
+    logger.info(f"🔵 Function: download_archive()")
+    logger.debug(f"🔵 Path parameter 'job_id': {job_id}, compression: {compression}")
+    
+    if compression not in COMPRESSIONS or (compression and compression not in available_compressions()):
+        print_request_end(f"/download/{job_id}.tar")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported compression {compression!r}, available: {available_compressions()}"
+        )
+    
+    output_dir = OUTPUT_DIR / safe_filename(job_id)
+    if not output_dir.is_dir():
+        wait_for_publish(output_dir)    # may be mid-swap
+    if not output_dir.is_dir():
+        logger.error(f"❌ Directory NOT found!")
+        print_request_end(f"/download/{job_id}.tar")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    RETENTION.touch(output_dir)
+    members = directory_members(output_dir, prefix=f"{job_id}/")
+    logger.info(f"🔵 Streaming {len(members)} files...")
+    
+    suffix, media_type = COMPRESSIONS[compression]
+    stream = compress_stream(iter_tar(members, chunk_size=UPLOAD_CHUNK_SIZE), compression)
+    
+    print_request_end(f"/download/{job_id}.tar")
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{job_id}{suffix}"'}
+    )
+
+
+# Name of the manifest inside a /sync archive
+SYNC_MANIFEST = ".sync.json"
+
+
+@app.post("/sync/{job_id}")
+def sync_outputs(job_id: str, request: SyncRequest):
+    """
+    Delta download of an output directory
+
+    The client posts the SHA-256 of every file it already has; the answer
+    is a tar stream with only the added or changed files. The first member
+    (SYNC_MANIFEST) lists changed, deleted and unchanged names so the
+    client can remove files that no longer exist.
+    """
+    print_request_start(f"/sync/{job_id}", "POST")
+    
+    logger.info(f"🔵 Function: sync_outputs()")
+    logger.debug(f"🔵 Path parameter 'job_id': {job_id}, client files: {len(request.files)}")
+    
+    compression = request.compression
+    if compression not in COMPRESSIONS or (compression and compression not in available_compressions()):
+        print_request_end(f"/sync/{job_id}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported compression {compression!r}, available: {available_compressions()}"
+        )
+    
+    artifacts = CATALOG.list(safe_filename(job_id))
+    if artifacts is None:
+        logger.error(f"❌ Directory NOT found!")
+        print_request_end(f"/sync/{job_id}")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    output_dir = OUTPUT_DIR / safe_filename(job_id)
+    RETENTION.touch(output_dir)
+    changed = [f["name"] for f in artifacts if request.files.get(f["name"]) != f["sha256"]]
+    on_server = {f["name"] for f in artifacts}
+    manifest = {
+        "job_id": job_id,
+        "changed": changed,
+        "deleted": sorted(set(request.files) - on_server),
+        "unchanged": len(artifacts) - len(changed),
+        "sha256": {f["name"]: f["sha256"] for f in artifacts},
+    }
+    logger.info(f"🔵 Sync: {len(changed)} changed, {len(manifest['deleted'])} deleted, "
+                f"{manifest['unchanged']} unchanged")
+    
+    members = [(output_dir / name, name) for name in changed]
+    extra = [(SYNC_MANIFEST, json.dumps(manifest, indent=2).encode())]
+    
+    suffix, media_type = COMPRESSIONS[compression]
+    stream = compress_stream(iter_tar(members, chunk_size=UPLOAD_CHUNK_SIZE, extra=extra), compression)
+    
+    print_request_end(f"/sync/{job_id}")
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{job_id}.sync{suffix}"',
+            "X-Sync-Changed": str(len(changed)),
+            "X-Sync-Deleted": str(len(manifest["deleted"])),
+        }
+    )
+
+
 @app.get("/download/{job_id}/{filename}")
-def download(job_id: str, filename:  str):
-    """Download mit Debug"""
+def download(job_id: str, filename:  str, request: Request):
+    """
+    Download mit Debug
+
+    Sends a strong content-hash ETag; If-None-Match answers 304 when the
+    client copy is current, and Range / If-Range resume partial transfers.
+    Clients sending Accept-Encoding get the gzip/zstd variant written at
+    publish time (with its own ETag) instead of the raw file, except for
+    Range / If-Range requests: byte offsets always refer to the raw file,
+    so resumed downloads get the identity file and its ETag.
+    """
     print_request_start(f"/download/{job_id}/{filename}", "GET")
     
     logger.info(f"🔵 Function: download()")
@@ -318,17 +1116,40 @@ def download(job_id: str, filename:  str):
     logger.debug(f"🔵 Path parameter 'filename':  {filename}")
     
     # Build path
-    filepath = OUTPUT_DIR / job_id / filename
+    filepath = OUTPUT_DIR / safe_filename(job_id) / safe_filename(filename)
     logger.debug(f"🔵 filepath: {filepath}")
     logger.debug(f"🔵 Checking if exists...")
     
-    if not filepath. exists():
+    if not filepath.is_file():
+        wait_for_publish(filepath.parent)    # may be mid-swap
+    if not filepath.is_file():
         logger.error(f"❌ File NOT found!")
         print_request_end(f"/download/{job_id}/{filename}")
         raise HTTPException(status_code=404, detail="File not found")
     
     logger.info(f"✅ File found!")
+    RETENTION.touch(filepath.parent)
+    
+    sha256 = CATALOG.file_hash(job_id, filename)
+    etag = f'"{sha256}"' if sha256 else content_etag(filepath)
+    
+    if "range" in request.headers or "if-range" in request.headers:
+        encoding, sendpath = None, filepath
+    else:
+        encoding, sendpath = encoded_variant(filepath, request.headers.get("accept-encoding"))
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding:
+        etag = f'{etag[:-1]}-{encoding}"'
+        headers["Content-Encoding"] = encoding
+        logger.debug(f"🔵 Sending pre-compressed {encoding} variant")
+    headers["ETag"] = etag
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        logger.info(f"🔵 Not modified ({etag[:14]}...)")
+        print_request_end(f"/download/{job_id}/{filename}")
+        return Response(status_code=304, headers=headers)
+    
     logger.info(f"🔵 Sending file...")
     
     print_request_end(f"/download/{job_id}/{filename}")
-    return FileResponse(filepath, filename=filename)
\ No newline at end of file
+    return FileResponse(sendpath, filename=filename, headers=headers)
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from config import UPLOAD_DIR, OUTPUT_DIR, CACHE_DIR, CONFIG_DIR, JOB_LOG_DIR, WORKSPACE_DIR, COMPILE_CACHE_MAX_BYTES, COMPILE_WORKERS, STEDGEAI_TIMEOUT, MAX_UPLOAD_SIZE
+from config import UPLOAD_MAX_BYTES, OUTPUT_MAX_BYTES, RETENTION_MAX_AGE, COMPILER_BACKEND, SIMULATED_BACKEND
+from config import MAX_PENDING_JOBS, MAX_JOBS_PER_CLIENT, MIN_FREE_MEMORY, MAX_CPU_LOAD
+from utils.stedgeai import STEdgeAI, GENERATE_FLAGS, ANALYZE_FLAGS, probe_toolchain, cached_probe, parse_analyze_report
+from utils.backends import SimulatedBackend
+from utils.toolchain import ToolchainConfig
+from utils.model_store import ModelStore
+from utils.resumable import UploadSessions
+from utils.compile_cache import CompileCache
+from utils.jobs import Job, JobQueue, FINISHED
+from utils.job_store import JobStore
+from utils.events import JobEvents
+from utils.workspace import WorkspacePool, publish_artifacts
+from utils.catalog import ArtifactCatalog
+from utils.retention import RetentionGC
+from utils.admission import AdmissionControl
+
+logger = logging.getLogger(__name__)
+
+
+def network_name(filename: str) -> str:
+    """Derive the C network name from the model filename"""
+    if "temperature" in filename.lower():
+        prefix = "err_seq_"
+
+    elif "humidity" in filename.lower():
+        prefix = "hum_seq_"
+    else:
+        prefix = "nn_"
+
+    logger.debug(f"🔵 Extracting number from filename: {filename}")
+    nn_number = ''.join(filter(str.isdigit, filename))
+    logger.debug(f"🔵 Extracted number: '{nn_number}'")
+
+    if not nn_number:
+        logger.warning(f"⚠️ No number found in filename '{filename}'")
+
+    return f"{prefix}{nn_number}"
+
+
+def output_name(params: dict) -> str:
+    """Folder below OUTPUT_DIR a job publishes to (the network name unless set)"""
+    return params.get("output") or params["name"]
+
+
+def job_key(params: dict) -> tuple:
+    """Identity of a compile: identical keys share one in-flight job"""
+    return (params["digest"], params["target"], params["name"], output_name(params))
+
+
+def paths_in_use() -> set:
+    """Model blobs and output dirs of queued or running jobs (kept by the GC)"""
+    paths = set()
+    for job in JOB_QUEUE.jobs():
+        if job.status in FINISHED:
+            continue
+        paths.add(MODEL_STORE.blob_path(job.params["digest"]))
+        paths.add(OUTPUT_DIR / output_name(job.params))
+    return paths
+
+
+def probe_in_background(stedgeai_path: Optional[str]):
+    """Probe a newly configured stedgeai binary without blocking the caller"""
+    def probe():
+        try:
+            probe_toolchain(stedgeai_path)
+        except Exception as e:
+            logger.error(f"❌ stedgeai probe failed: {e}")
+
+    if stedgeai_path:
+        threading.Thread(target=probe, name="stedgeai-probe", daemon=True).start()
+
+
+def toolchain_probe() -> Optional[dict]:
+    """Capabilities of the current stedgeai, None while unknown (never blocks)"""
+    if BACKEND is not None:
+        return BACKEND.capabilities()
+    try:
+        return cached_probe(TOOLCHAIN.stedgeai_path())
+    except FileNotFoundError:
+        return None
+
+
+def job_log_file(job_id: str) -> Path:
+    """Per-job file receiving the live stedgeai output"""
+    return JOB_LOG_DIR / f"{job_id}.log"
+
+
+def compile_key(params: dict, fingerprint: str) -> str:
+    """Compile cache key of a generate job"""
+    return COMPILE_CACHE.make_key(params["digest"], params["target"], params["name"], fingerprint, GENERATE_FLAGS)
+
+
+def is_cached(params: dict) -> bool:
+    """
+    Whether run_generate would be served from the compile cache
+
+    Such jobs need no worker and are started inline instead of queueing
+    behind running compiles. Never blocks: False while the toolchain is
+    not probed yet.
+    """
+    probe = toolchain_probe()
+    return probe is not None and COMPILE_CACHE.contains(compile_key(params, probe["fingerprint"]))
+
+
+async def _publish(artifacts: list, output_dir: Path, project_dir: Optional[Path]) -> dict:
+    """Publish a build and return its footprint"""
+    footprint = await asyncio.to_thread(generate_footprint, artifacts)
+    await asyncio.to_thread(publish_artifacts, artifacts, output_dir, project_dir)
+    return footprint
+
+
+async def run_generate(job: Job) -> dict:
+    """
+    Compile one model (runs as a job worker task, or inline for cache hits)
+
+    Expects job.params with digest, target and name (the network name),
+    optionally output (folder below OUTPUT_DIR, default: name) and
+    project=False to leave the BSC project alone. Blocking file work is
+    pushed to threads; stedgeai itself runs as an asyncio subprocess with
+    a wall-clock timeout.
+
+    Returns:
+        Result dict with output dir, artifact names, footprint and cache status
+
+    Raises:
+        RuntimeError: If stedgeai fails or times out
+    """
+    digest = job.params["digest"]
+    target = job.params["target"]
+    nn_name = job.params["name"]
+    model_path = MODEL_STORE.blob_path(digest)
+    log_file = job_log_file(job.id)
+    RETENTION.touch(model_path)
+
+    out_name = output_name(job.params)
+    output_dir = OUTPUT_DIR / out_name
+    logger.debug(f"🔵 output_dir:  {output_dir}")
+
+    # Without a configured BSC project (or for evaluation builds) only OUTPUT_DIR is updated
+    x_cube_ai = TOOLCHAIN.workspace_path()
+    x_cube_ai_app = x_cube_ai /"X-CUBE-AI"/"App" if x_cube_ai != Path("") else None
+    if not job.params.get("project", True):
+        x_cube_ai_app = None
+    logger.debug(f"🔵 workspace path:  {x_cube_ai_app}")
+
+    stedgeai = STEdgeAI(
+        model_file=model_path, network=nn_name, target=target, toolchain=TOOLCHAIN, backend=BACKEND
+    )
+
+    # Serve from compile cache if this exact build was done before (no workspace slot needed)
+    capabilities = await asyncio.to_thread(stedgeai.capabilities)
+    fingerprint = capabilities["fingerprint"]
+    job.params["toolchain"] = {"version": capabilities["version"], "fingerprint": fingerprint}
+    cache_key = compile_key(job.params, fingerprint)
+    logger.debug(f"🔵 Compile cache key: {cache_key}")
+
+    cached = await asyncio.to_thread(COMPILE_CACHE.get, cache_key) is not None
+    if cached:
+        artifacts = await asyncio.to_thread(COMPILE_CACHE.files, cache_key)
+        logger.info(f"⚡ Using {len(artifacts)} cached files")
+        EVENTS.publish(job.id, "log", {"stream": "server", "line": f"Compile cache hit, {len(artifacts)} files"})
+        footprint = await _publish(artifacts, output_dir, x_cube_ai_app)
+    else:
+        async with WORKSPACES.acquire() as slot:
+            stedgeai.output_dir = slot / "output"
+            stedgeai.workspace_dir = slot / "ws"
+
+            logger.debug(f"🔵 Running stedgeai generate in {slot.name}, log: {log_file}")
+            result = await stedgeai.generate_model(
+                log_file, timeout=STEDGEAI_TIMEOUT,
+                on_line=lambda stream, line: EVENTS.publish(job.id, "log", {"stream": stream, "line": line})
+            )
+            job.exit_code = result.returncode
+
+            if result.timed_out:
+                raise RuntimeError(f"stedgeai timed out after {STEDGEAI_TIMEOUT}s")
+            if not result.ok:
+                logger.error(f"❌ stedgeai generation failed!")
+                raise RuntimeError(f"Model generation failed (exit code {result.returncode})")
+
+            logger.info(f"✅ stedgeai generation completed in {result.duration:.1f}s")
+
+            artifacts = await asyncio.to_thread(stedgeai.collect_artifacts)
+            if artifacts:
+                await asyncio.to_thread(COMPILE_CACHE.put, cache_key, artifacts)
+            footprint = await _publish(artifacts, output_dir, x_cube_ai_app)
+
+    await asyncio.to_thread(CATALOG.record, out_name)
+    RETENTION.touch(output_dir)
+
+    logger.info(f"✅ Files saved to {output_dir}")
+
+    return {
+        "name": out_name,
+        "network": nn_name,
+        "output_dir": str(output_dir),
+        "cached": cached,
+        "footprint": footprint,
+        "files": [f.name for f in artifacts],
+        "outputs_url": f"/outputs/{out_name}",
+        "log_url": f"/jobs/{job.id}/log",
+    }
+
+
+def generate_footprint(artifacts: list) -> dict:
+    """RAM / flash / MACC from the report stedgeai generate writes next to the code"""
+    for f in artifacts:
+        if f.name.endswith("_generate_report.txt"):
+            return parse_analyze_report(f.read_text(errors="replace"))
+    return {}
+
+
+# Running analyses by cache key, so identical requests share one stedgeai run
+_analyses: Dict[str, asyncio.Task] = {}
+
+
+async def analyze_model(digest: str, target: str) -> Tuple[dict, bool]:
+    """
+    Footprint report (RAM / flash / MACC) of a stored model
+
+    Reports are kept in the compile cache under (digest, target, toolchain),
+    so stedgeai analyze runs once per combination.
+
+    Returns:
+        (report, cached)
+
+    Raises:
+        RuntimeError: If stedgeai analyze fails or times out
+    """
+    model_path = MODEL_STORE.blob_path(digest)
+    RETENTION.touch(model_path)
+
+    stedgeai = STEdgeAI(model_file=model_path, network="network", target=target, toolchain=TOOLCHAIN, backend=BACKEND)
+    fingerprint = (await asyncio.to_thread(stedgeai.capabilities))["fingerprint"]
+    cache_key = COMPILE_CACHE.make_key(digest, target, "analyze", fingerprint, ["analyze", *ANALYZE_FLAGS])
+
+    entry = await asyncio.to_thread(COMPILE_CACHE.get, cache_key)
+    if entry is not None:
+        report = await asyncio.to_thread((entry / "report.json").read_text)
+        return json.loads(report), True
+
+    task = _analyses.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_run_analyze(stedgeai, cache_key))
+        _analyses[cache_key] = task
+        task.add_done_callback(lambda t: _analysis_done(cache_key, t))
+    else:
+        logger.info(f"🔗 Attached to running analyze {cache_key[:12]}")
+
+    return await asyncio.shield(task), False
+
+
+def _analysis_done(cache_key: str, task: asyncio.Task):
+    _analyses.pop(cache_key, None)
+    if not task.cancelled():
+        task.exception()    # retrieved here too, in case every caller went away
+
+
+async def _run_analyze(stedgeai: STEdgeAI, cache_key: str) -> dict:
+    async with WORKSPACES.acquire() as slot:
+        stedgeai.output_dir = slot / "output"
+        stedgeai.workspace_dir = slot / "ws"
+        log_file = slot / "analyze.log"
+
+        logger.debug(f"🔵 Running stedgeai analyze in {slot.name}")
+        result = await stedgeai.analyze_model(log_file, timeout=STEDGEAI_TIMEOUT)
+
+        if result.timed_out:
+            raise RuntimeError(f"stedgeai analyze timed out after {STEDGEAI_TIMEOUT}s")
+        if not result.ok:
+            raise RuntimeError(f"Model analysis failed (exit code {result.returncode})")
+
+        report = await asyncio.to_thread(stedgeai.analyze_report, log_file)
+        logger.info(f"✅ stedgeai analyze completed in {result.duration:.1f}s: {report}")
+
+        report_file = slot / "report.json"
+        await asyncio.to_thread(report_file.write_text, json.dumps(report, indent=2))
+        await asyncio.to_thread(COMPILE_CACHE.put, cache_key, [report_file, log_file])
+
+    return report
+
+
+# ============================================================================
+# SHARED INSTANCES
+# ============================================================================
+
+TOOLCHAIN = ToolchainConfig(CONFIG_DIR, on_reload=probe_in_background)
+# None = the real stedgeai CLI found via TOOLCHAIN
+BACKEND = SimulatedBackend(**SIMULATED_BACKEND) if COMPILER_BACKEND == "simulated" else None
+MODEL_STORE = ModelStore(UPLOAD_DIR)
+UPLOAD_SESSIONS = UploadSessions(MODEL_STORE, max_size=MAX_UPLOAD_SIZE)
+COMPILE_CACHE = CompileCache(CACHE_DIR / "compile", COMPILE_CACHE_MAX_BYTES)
+CATALOG = ArtifactCatalog(CACHE_DIR / "catalog.sqlite3", OUTPUT_DIR)
+WORKSPACES = WorkspacePool(WORKSPACE_DIR, size=COMPILE_WORKERS)
+JOB_STORE = JobStore(CACHE_DIR / "jobs.sqlite3")
+EVENTS = JobEvents()
+JOB_QUEUE = JobQueue(handler=run_generate, workers=COMPILE_WORKERS, key=job_key, store=JOB_STORE, events=EVENTS)
+RETENTION = RetentionGC(
+    MODEL_STORE, CATALOG,
+    upload_max_bytes=UPLOAD_MAX_BYTES, output_max_bytes=OUTPUT_MAX_BYTES,
+    max_age=RETENTION_MAX_AGE, in_use=paths_in_use
+)
+ADMISSION = AdmissionControl(
+    JOB_QUEUE, max_pending=MAX_PENDING_JOBS, per_client=MAX_JOBS_PER_CLIENT,
+    min_free_memory=MIN_FREE_MEMORY, max_cpu_load=MAX_CPU_LOAD
+)
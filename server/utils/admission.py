@@ -0,0 +1,250 @@
+import ctypes
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # optional, /proc and os.getloadavg are used instead
+    psutil = None
+
+from utils.jobs import JobQueue, FINISHED
+
+logger = logging.getLogger(__name__)
+
+# Assumed run time of a compile until the queue has finished some
+DEFAULT_RUN_S = 30.0
+
+
+class Overloaded(Exception):
+    """A request was refused by admission control
+
+    retry_after is None if the jobs can never be admitted together (more
+    than a limit allows), so retrying the same request is pointless.
+    """
+
+    def __init__(self, reason: str, retry_after: Optional[int]):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def available_memory() -> Optional[int]:
+    """Bytes of memory available to new processes, None if unknown"""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    if os.name == "nt":
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def cpu_load() -> Optional[float]:
+    """CPU load per core (1.0 = every core busy), None if unknown"""
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None) / 100
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdmissionControl(object):
+    """Decides whether new compile jobs may be queued
+
+    Checked before a generate request creates jobs; jobs that attach to an
+    identical in-flight job are free. Jobs are refused (Overloaded,
+    answered with 429 + Retry-After) when
+
+      - the client (source IP) already has per_client jobs queued or running,
+      - more than max_pending jobs would be waiting for a worker, or
+      - the host is short of memory or CPU and jobs are already waiting.
+
+    Batches are admitted partially: the jobs that fit are admitted in
+    order and only the rest are refused, so a batch larger than a limit
+    still makes progress. Single requests are admitted whole.
+
+    Under host pressure the queue is only allowed to drain, so the workers
+    keep compiling at full speed instead of every request slowing down.
+    Retry-After is estimated from the queue depth and the average run time
+    of recent jobs. Host metrics are sampled at most every sample_interval
+    seconds.
+
+    Usage:
+        admission = AdmissionControl(JOB_QUEUE, max_pending=16, per_client=8)
+        admission.admit("10.0.0.7", [params])    # raises Overloaded
+        refused, why = admission.admit("10.0.0.7", batch, partial=True)
+        admission.stats()                        # for GET /admission
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        max_pending: int,
+        per_client: int,
+        min_free_memory: int = 0,
+        max_cpu_load: float = 0.0,
+        sample_interval: float = 1.0
+    ):
+        self.queue = queue
+        self.max_pending = max_pending
+        self.per_client = per_client
+        self.min_free_memory = min_free_memory
+        self.max_cpu_load = max_cpu_load
+        self.sample_interval = sample_interval
+
+        self._lock = threading.Lock()
+        self._sampled_at = float("-inf")
+        self._memory: Optional[int] = None
+        self._load: Optional[float] = None
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def admit(self, client: str, params: List[dict], partial: bool = False) -> Tuple[List[dict], Optional[Overloaded]]:
+        """
+        Admit the jobs one request is about to submit
+
+        Args:
+            client: Source IP of the request
+            params: Job parameters (jobs attaching to in-flight ones are not counted)
+            partial: Admit the jobs that fit (in order) and return the rest
+                instead of refusing the whole request
+
+        Returns:
+            (refused params, why they were refused) - ([], None) if all fit
+
+        Raises:
+            Overloaded: If not all jobs fit and partial is False, with the
+                reason and a Retry-After estimate in seconds (None if they
+                never fit together)
+        """
+        fresh = [p for p in params if self.queue.inflight(p) is None]
+        keys = list(dict.fromkeys(self._key(p) for p in fresh))
+        new = len(keys)
+        if not new:
+            return [], None
+
+        limit = min(self.per_client, self.max_pending)
+        if new > limit and not partial:
+            raise self._refuse("size", f"{new} jobs can never be admitted together (limit {limit})", None)
+
+        pending = self.queue.pending()
+        mine = sum(
+            1 for job in self.queue.jobs()
+            if job.status not in FINISHED and job.params.get("client") == client
+        )
+        # (room left, kind, reason, jobs ahead of a retry) per limit, the tightest one wins
+        checks = [
+            (self.per_client - mine, "client",
+             f"Client {client} has {mine} jobs queued or running (limit {self.per_client})", 1),
+            (self.max_pending - pending, "queue",
+             f"{pending} jobs waiting for a worker (limit {self.max_pending})", pending + new - self.max_pending),
+        ]
+        pressure = self._pressure()
+        if pressure and pending > 0:
+            checks.append((0, "host", f"Build host under load ({pressure}), {pending} jobs waiting", pending))
+
+        room, kind, reason, ahead = min(checks, key=lambda c: c[0])
+        if room >= new:
+            self.admitted += new
+            return [], None
+
+        refusal = self._refuse(kind, reason, self._retry_after(ahead))
+        if not partial:
+            raise refusal
+        room = max(room, 0)
+        self.admitted += room
+        admitted = set(keys[:room])
+        return [p for p in fresh if self._key(p) not in admitted], refusal
+
+    def stats(self) -> dict:
+        self._sample()
+        return {
+            "limits": {
+                "max_pending": self.max_pending,
+                "per_client": self.per_client,
+                "min_free_memory": self.min_free_memory,
+                "max_cpu_load": self.max_cpu_load,
+            },
+            "pending": self.queue.pending(),
+            "running": self.queue.running(),
+            "available_memory": self._memory,
+            "cpu_load": round(self._load, 3) if self._load is not None else None,
+            "avg_run_s": round(self._avg_run_s(), 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _key(self, params: dict):
+        """Identity of a job, so repeats within one request are counted once"""
+        return self.queue.key(params) if self.queue.key else id(params)
+
+    def _refuse(self, kind: str, reason: str, retry_after: Optional[int]) -> Overloaded:
+        self.rejected[kind] = self.rejected.get(kind, 0) + 1
+        if retry_after is None:
+            logger.warning(f"🚦 Refused: {reason}")
+        else:
+            logger.warning(f"🚦 Refused: {reason}, retry after {retry_after}s")
+        return Overloaded(reason, retry_after)
+
+    def _sample(self):
+        now = time.monotonic()
+        if now - self._sampled_at < self.sample_interval:
+            return
+        with self._lock:
+            if now - self._sampled_at < self.sample_interval:
+                return
+            self._memory = available_memory()
+            self._load = cpu_load()
+            self._sampled_at = now
+
+    def _pressure(self) -> Optional[str]:
+        """Why the host is overloaded, None if it is not (or unknown)"""
+        self._sample()
+        if self.min_free_memory and self._memory is not None and self._memory < self.min_free_memory:
+            return f"{self._memory // (1024 * 1024)} MiB free"
+        if self.max_cpu_load and self._load is not None and self._load > self.max_cpu_load:
+            return f"CPU load {self._load:.2f}"
+        return None
+
+    def _avg_run_s(self, window: int = 50) -> float:
+        runs = [
+            job.finished_at - job.started_at
+            for job in self.queue.jobs()
+            if job.status in FINISHED and job.started_at and job.finished_at
+        ][-window:]
+        return sum(runs) / len(runs) if runs else DEFAULT_RUN_S
+
+    def _retry_after(self, jobs_ahead: int) -> int:
+        """Seconds until about jobs_ahead jobs have been worked off"""
+        rounds = math.ceil(max(jobs_ahead, 1) / self.queue.workers)
+        return max(1, min(math.ceil(rounds * self._avg_run_s()), 3600))
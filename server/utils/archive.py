@@ -0,0 +1,134 @@
+import logging
+import tarfile
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd compression
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK = tarfile.BLOCKSIZE          # 512
+RECORD = tarfile.RECORDSIZE        # 10240
+
+# compression name -> (file suffix, media type)
+COMPRESSIONS = {
+    None: (".tar", "application/x-tar"),
+    "gzip": (".tar.gz", "application/gzip"),
+    "zstd": (".tar.zst", "application/zstd"),
+}
+
+
+def available_compressions() -> List[str]:
+    names = ["gzip"]
+    if zstandard is not None:
+        names.append("zstd")
+    return names
+
+
+def _member_header(arcname: str, size: int, mtime: float) -> bytes:
+    info = tarfile.TarInfo(name=arcname)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _padding(length: int, boundary: int) -> bytes:
+    return b"\0" * (-length % boundary)
+
+
+def iter_tar(
+    members: Iterable[Tuple[Path, str]],
+    chunk_size: int = 1024 * 1024,
+    extra: Optional[List[Tuple[str, bytes]]] = None
+) -> Iterator[bytes]:
+    """
+    Yield a tar archive piece by piece
+
+    Headers and file data are produced on the fly, so memory use stays at
+    one chunk no matter how large the directory is.
+
+    Args:
+        members: (path on disk, name inside the archive) pairs
+        chunk_size: Bytes read from disk at a time
+        extra: Optional (name, content) pairs added first, e.g. a manifest
+
+    Yields:
+        Raw tar bytes
+    """
+    written = 0
+
+    for arcname, content in extra or []:
+        header = _member_header(arcname, len(content), time.time())
+        pad = _padding(len(content), BLOCK)
+        yield header + content + pad
+        written += len(header) + len(content) + len(pad)
+
+    for path, arcname in members:
+        st = path.stat()
+        header = _member_header(arcname, st.st_size, st.st_mtime)
+        yield header
+        written += len(header)
+
+        # Stick to the size announced in the header even if the file changes
+        remaining = st.st_size
+        with open(path, "rb") as f:
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    chunk = b"\0" * remaining
+                remaining -= len(chunk)
+                written += len(chunk)
+                yield chunk
+
+        pad = _padding(st.st_size, BLOCK)
+        if pad:
+            yield pad
+            written += len(pad)
+
+    end = b"\0" * (2 * BLOCK)
+    written += len(end)
+    yield end + _padding(written, RECORD)
+
+
+def compress_stream(chunks: Iterable[bytes], compression: Optional[str]) -> Iterator[bytes]:
+    """
+    Compress a byte stream incrementally
+
+    Args:
+        chunks: Input pieces
+        compression: None, "gzip" or "zstd"
+
+    Raises:
+        ValueError: Unknown or unavailable compression
+    """
+    if compression is None:
+        yield from chunks
+        return
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits 31 = gzip container
+    elif compression == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def directory_members(directory: Path, prefix: str = "") -> List[Tuple[Path, str]]:
+    """Regular files of a directory as (path, arcname) pairs, sorted by name"""
+    return [
+        (f, f"{prefix}{f.name}")
+        for f in sorted(directory.iterdir())
+        if f.is_file()
+    ]
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, List, Optional
+from utils.runner import RunResult
+
+logger = logging.getLogger(__name__)
+
+
+class CompilerBackend(ABC):
+    """What STEdgeAI needs from a compiler
+
+    The real implementation (StedgeaiBackend in utils.stedgeai) runs the
+    stedgeai CLI; SimulatedBackend stands in for it where no toolchain is
+    installed.
+
+    run() writes "[stdout] ..." / "[stderr] ..." lines to log_file and the
+    artifacts to output_dir, like the stedgeai CLI does.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def capabilities(self) -> dict:
+        """{"backend", "version", "targets", "fingerprint", "probed_at"}"""
+
+    @abstractmethod
+    async def run(
+        self,
+        action: str,
+        model_file: Path,
+        network: str,
+        target: str,
+        output_dir: Optional[Path],
+        workspace_dir: Optional[Path],
+        log_file: Path,
+        timeout: Optional[float] = None,
+        on_line: Optional[Callable[[str, str], None]] = None
+    ) -> RunResult:
+        """
+        Run "generate" or "analyze" for one model
+
+        Raises:
+            asyncio.CancelledError: If the caller was cancelled (work is stopped first)
+        """
+
+
+def _burn(seconds: float):
+    """Keep one core busy (hashlib releases the GIL, the event loop keeps running)"""
+    block = b"\0" * 65536
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        hashlib.sha256(block).digest()
+
+
+def _hex_rows(data: bytes, width: int = 16) -> List[str]:
+    return [
+        "  " + ", ".join(f"0x{b:02x}" for b in data[i:i + width]) + ","
+        for i in range(0, len(data), width)
+    ]
+
+
+class SimulatedBackend(CompilerBackend):
+    """Deterministic stand-in for stedgeai, for load tests on any machine
+
+    A run takes `seconds` plus `seconds_per_mib` per MiB of model, of which
+    the `cpu` share is spent busy on a worker thread. generate writes the
+    usual network*.c/.h files with the weights dumped as C arrays, so the
+    artifact sizes follow the model size; analyze prints a footprint summary
+    in stedgeai's format. A `failure_rate` share of (model, target, network)
+    combinations fails with exit code 1, always the same ones, so runs can be
+    compared with each other.
+
+    Usage:
+        backend = SimulatedBackend(seconds=2.0, cpu=0.25, failure_rate=0.05)
+        stedgeai = STEdgeAI(model_file, "network", output_dir=out, backend=backend)
+        result = await stedgeai.generate_model(log_file)
+    """
+
+    name = "simulated"
+    version = "0.0.0-simulated"
+    targets = ["stm32f4", "stm32f7", "stm32g4", "stm32h7", "stm32l4", "stm32n6", "stm32u5", "stm32wl"]
+
+    def __init__(
+        self,
+        seconds: float = 2.0,
+        seconds_per_mib: float = 0.5,
+        cpu: float = 0.25,
+        failure_rate: float = 0.0,
+        steps: int = 10
+    ):
+        self.seconds = seconds
+        self.seconds_per_mib = seconds_per_mib
+        self.cpu = min(max(cpu, 0.0), 1.0)
+        self.failure_rate = failure_rate
+        self.steps = max(steps, 1)
+
+        settings = json.dumps([self.version, seconds, seconds_per_mib, self.cpu, failure_rate], sort_keys=True)
+        self._fingerprint = hashlib.sha256(settings.encode()).hexdigest()
+        self._started = time.time()
+
+    def capabilities(self) -> dict:
+        return {
+            "backend": self.name,
+            "version": self.version,
+            "targets": self.targets,
+            "fingerprint": self._fingerprint,
+            "probed_at": self._started,
+        }
+
+    def fails(self, model_digest: str, target: str, network: str) -> bool:
+        """Whether this combination is one of the injected failures"""
+        h = hashlib.sha256(f"{model_digest}:{target}:{network}".encode()).digest()
+        return int.from_bytes(h[:4], "big") / 2 ** 32 < self.failure_rate
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        action: str,
+        model_file: Path,
+        network: str,
+        target: str,
+        output_dir: Optional[Path],
+        workspace_dir: Optional[Path],
+        log_file: Path,
+        timeout: Optional[float] = None,
+        on_line: Optional[Callable[[str, str], None]] = None
+    ) -> RunResult:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        model = await asyncio.to_thread(Path(model_file).read_bytes)
+        digest = hashlib.sha256(model).hexdigest()
+        output_dir = Path(output_dir or ".")
+
+        with open(log_file, "a", encoding="utf-8", buffering=1) as log:
+
+            def emit(stream: str, line: str):
+                log.write(f"[{stream}] {line}\n")
+                if on_line:
+                    on_line(stream, line)
+
+            def finish(returncode: int, timed_out: bool = False) -> RunResult:
+                duration = time.monotonic() - started
+                log.write(f"[runner] exit code {returncode} after {duration:.1f}s\n")
+                return RunResult(returncode=returncode, duration=duration, timed_out=timed_out)
+
+            emit("stdout", f"ST Edge AI Core v{self.version} ({self.name} backend)")
+            emit("stdout", f"{action} -m {Path(model_file).name} -n {network} --target {target}")
+
+            if target.lower() not in self.targets:
+                emit("stderr", f"E010(InvalidCommandLineError): Unknown target '{target}'")
+                return finish(2)
+
+            total = self.seconds + self.seconds_per_mib * len(model) / (1024 * 1024)
+            step = total / self.steps
+            try:
+                for i in range(self.steps):
+                    if timeout is not None and time.monotonic() - started + step > timeout:
+                        await asyncio.sleep(max(timeout - (time.monotonic() - started), 0))
+                        log.write(f"[runner] timed out after {timeout}s, killed\n")
+                        return finish(-9, timed_out=True)
+                    busy = step * self.cpu
+                    if busy:
+                        await asyncio.to_thread(_burn, busy)
+                    await asyncio.sleep(step - busy)
+                    emit("stdout", f" {action} step {i + 1}/{self.steps}")
+            except asyncio.CancelledError:
+                log.write("[runner] cancelled, killed\n")
+                raise
+
+            if self.fails(digest, target, network):
+                emit("stderr", f"E103(CliRuntimeError): simulated failure for {digest[:12]} on {target}")
+                return finish(1)
+
+            output_dir.mkdir(parents=True, exist_ok=True)
+            if action == "analyze":
+                report = self._analyze_report(model, network, target)
+                await asyncio.to_thread((output_dir / f"{network}_analyze_report.txt").write_text, report)
+                for line in report.splitlines():
+                    emit("stdout", line)
+            else:
+                files = await asyncio.to_thread(self._write_sources, model, network, target, output_dir)
+                emit("stdout", f"Generated files ({len(files)}): {', '.join(files)}")
+
+            return finish(0)
+
+    # ------------------------------------------------------------------
+    # Fake outputs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _footprint(model: bytes) -> dict:
+        weights = len(model) * 9 // 10
+        activations = max(len(model) // 8, 1024)
+        return {
+            "macc": len(model) * 3,
+            "weights": weights,
+            "activations": activations,
+            "flash": weights + 20000,
+            "ram": activations + 2000,
+        }
+
+    def _analyze_report(self, model: bytes, network: str, target: str) -> str:
+        f = self._footprint(model)
+        return "\n".join([
+            f" model name         : {network}",
+            f" target             : {target}",
+            f" macc               : {f['macc']:,}",
+            f" weights (ro)       : {f['weights']:,} B",
+            f" activations (rw)   : {f['activations']:,} B",
+            f" ram (total)        : {f['activations']:,} B",
+            "",
+            " Summary - FLASH (ro) / RAM (rw)",
+            f" TOTAL        {f['flash']:,}   100.0%   {f['ram']:,}   100.0%",
+        ]) + "\n"
+
+    def _write_sources(self, model: bytes, network: str, target: str, output_dir: Path) -> List[str]:
+        guard = network.upper()
+        f = self._footprint(model)
+        sources = {
+            f"{network}.h": (
+                f"#ifndef {guard}_H\n#define {guard}_H\n"
+                f"#define AI_{guard}_IN_NUM 1\n#define AI_{guard}_OUT_NUM 1\n"
+                f"#define AI_{guard}_DATA_ACTIVATIONS_SIZE {f['activations']}\n"
+                f"#define AI_{guard}_DATA_WEIGHTS_SIZE {f['weights']}\n#endif\n"
+            ),
+            f"{network}.c": (
+                f"/* {network} for {target}, generated by the {self.name} backend */\n"
+                f'#include "{network}.h"\n#include "{network}_data.h"\n'
+                + "".join(f"static void layer_{i}(void) {{ }}\n" for i in range(max(len(model) // 4096, 1)))
+            ),
+            f"{network}_data.h": f'#include "{network}_data_params.h"\n',
+            f"{network}_data.c": f'#include "{network}_data.h"\n',
+            f"{network}_data_params.h": f"extern const unsigned char s_{network}_weights[{len(model)}];\n",
+            f"{network}_data_params.c": (
+                f"const unsigned char s_{network}_weights[{len(model)}] = {{\n"
+                + "\n".join(_hex_rows(model)) + "\n};\n"
+            ),
+            f"{network}_config.h": f"#define AI_{guard}_TARGET \"{target}\"\n",
+            f"{network}_generate_report.txt": self._analyze_report(model, network, target),
+        }
+        for name, text in sources.items():
+            (output_dir / name).write_text(text)
+        return sorted(sources)
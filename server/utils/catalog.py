@@ -0,0 +1,266 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.listing import keyset_page
+from utils.model_store import file_digest
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    job_id       TEXT PRIMARY KEY,
+    dir_mtime_ns INTEGER NOT NULL,
+    file_count   INTEGER NOT NULL,
+    total_size   INTEGER NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    job_id   TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    sha256   TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (job_id, name)
+);
+CREATE INDEX IF NOT EXISTS outputs_mtime ON outputs (dir_mtime_ns, job_id);
+CREATE INDEX IF NOT EXISTS outputs_size ON outputs (total_size, job_id);
+CREATE INDEX IF NOT EXISTS artifacts_mtime ON artifacts (job_id, mtime_ns, name);
+CREATE INDEX IF NOT EXISTS artifacts_size ON artifacts (job_id, size, name);
+CREATE TABLE IF NOT EXISTS usage (
+    job_id    TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class ArtifactCatalog(object):
+    """SQLite index of everything below OUTPUT_DIR
+
+    Artifacts are recorded with name, size, SHA-256 and mtime when a job
+    publishes them, so listings are answered from the index instead of
+    walking the directory tree.
+
+    The filesystem stays the source of truth: each lookup compares one
+    directory mtime with the stored value and only rescans that single
+    directory when it changed (files with unchanged size and mtime keep
+    their stored hash).
+
+    Usage:
+        catalog = ArtifactCatalog(Path("./cache/catalog.sqlite3"), OUTPUT_DIR)
+        catalog.record("nn_12")          # after publishing
+        files = catalog.list("nn_12")    # [{"name", "size", "sha256", "mtime"}, ...]
+        page = catalog.page(sort="mtime", order="desc", limit=50)   # listings, paged in SQL
+    """
+
+    def __init__(self, db_path: Path, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+
+    def record(self, job_id: str):
+        """Index (or re-index) one output directory"""
+        self._sync(job_id, force=True)
+
+    def touch(self, job_id: str, at: float):
+        """Remember when an output directory was last used (for retention, survives restarts)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO usage (job_id, last_used) VALUES (?, ?)", (job_id, at)
+            )
+
+    def forget(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM usage WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM outputs WHERE job_id = ?", (job_id,))
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def list(self, job_id: str) -> Optional[List[dict]]:
+        """
+        Artifacts of one output directory
+
+        Returns:
+            List of file dicts sorted by name, None if the directory is gone
+        """
+        if not self._sync(job_id):
+            return None
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, size, sha256, mtime_ns FROM artifacts WHERE job_id = ? ORDER BY name",
+                (job_id,)
+            ).fetchall()
+
+        return [self._artifact(r) for r in rows]
+
+    def list_page(self, job_id: str, sort: str = "name", order: str = "asc", prefix: Optional[str] = None,
+                  cursor: Optional[str] = None, limit: int = 100) -> Optional[dict]:
+        """
+        One page of the artifacts of an output directory (see keyset_page)
+
+        Returns:
+            Page of file dicts, None if the directory is gone
+        """
+        if not self._sync(job_id):
+            return None
+        return keyset_page(
+            self._conn, self._lock, "artifacts", {"name": "name", "mtime": "mtime_ns", "size": "size"},
+            self._artifact, sort, order, prefix, cursor, limit, where="job_id = ?", args=(job_id,)
+        )
+
+    def page(self, sort: str = "name", order: str = "asc", prefix: Optional[str] = None,
+             cursor: Optional[str] = None, limit: int = 100) -> dict:
+        """One page of the output directories (see keyset_page)"""
+        self._sync_root()
+        return keyset_page(
+            self._conn, self._lock, "outputs", {"name": "job_id", "mtime": "dir_mtime_ns", "size": "total_size"},
+            self._output, sort, order, prefix, cursor, limit
+        )
+
+    def jobs(self) -> List[dict]:
+        """All output directories with file count, total size and mtime"""
+        self._sync_root()
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, dir_mtime_ns, file_count, total_size FROM outputs ORDER BY job_id"
+            ).fetchall()
+
+        return [self._output(r) for r in rows]
+
+    def usage(self) -> Dict[str, float]:
+        """Last use per output directory, as recorded by touch()"""
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id, last_used FROM usage").fetchall()
+        return {r["job_id"]: r["last_used"] for r in rows}
+
+    def file_hash(self, job_id: str, name: str) -> Optional[str]:
+        """Stored SHA-256 of a file if the file is unchanged since indexing"""
+        try:
+            st = (self.root / job_id / name).stat()
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, sha256, mtime_ns FROM artifacts WHERE job_id = ? AND name = ?",
+                (job_id, name)
+            ).fetchone()
+
+        if row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns:
+            return row["sha256"]
+        return None
+
+    @staticmethod
+    def _artifact(row: sqlite3.Row) -> dict:
+        return {"name": row["name"], "size": row["size"], "sha256": row["sha256"], "mtime": row["mtime_ns"] / 1e9}
+
+    @staticmethod
+    def _output(row: sqlite3.Row) -> dict:
+        return {"name": row["job_id"], "files": row["file_count"], "size": row["total_size"],
+                "mtime": row["dir_mtime_ns"] / 1e9}
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def _sync(self, job_id: str, force: bool = False) -> bool:
+        """
+        Bring one directory's rows in line with the filesystem
+
+        Returns:
+            False if the directory does not exist
+        """
+        directory = self.root / job_id
+        try:
+            dir_mtime_ns = directory.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            self.forget(job_id)
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dir_mtime_ns FROM outputs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row and row["dir_mtime_ns"] == dir_mtime_ns and not force:
+                return True
+
+            known: Dict[str, sqlite3.Row] = {
+                r["name"]: r for r in self._conn.execute(
+                    "SELECT name, size, sha256, mtime_ns FROM artifacts WHERE job_id = ?", (job_id,)
+                )
+            }
+
+        # Hash outside the lock, only files that are new or changed
+        files = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                old = known.get(entry.name)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    sha = old["sha256"]
+                else:
+                    sha = file_digest(Path(entry.path))
+                files.append((job_id, entry.name, st.st_size, sha, st.st_mtime_ns))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+            self._conn.executemany(
+                "INSERT INTO artifacts (job_id, name, size, sha256, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                files
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outputs (job_id, dir_mtime_ns, file_count, total_size, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, dir_mtime_ns, len(files), sum(f[2] for f in files), time.time())
+            )
+
+        logger.debug(f"🔧 Catalog indexed {job_id}: {len(files)} files")
+        return True
+
+    def _sync_root(self):
+        """Pick up output directories created or removed outside the server"""
+        root_mtime_ns = self.root.stat().st_mtime_ns
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'root_mtime_ns'").fetchone()
+            if row and row["value"] == root_mtime_ns:
+                return
+            indexed = {r["job_id"] for r in self._conn.execute("SELECT job_id FROM outputs")}
+
+        on_disk = {
+            entry.name for entry in os.scandir(self.root)
+            if entry.is_dir() and not entry.name.startswith(".")
+        }
+
+        for job_id in on_disk - indexed:
+            self._sync(job_id)
+        for job_id in indexed - on_disk:
+            self.forget(job_id)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('root_mtime_ns', ?)", (root_mtime_ns,)
+            )
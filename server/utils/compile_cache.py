@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CompileCache(object):
+    """Persistent cache of stedgeai generate results
+
+    Each entry is a directory named after the cache key holding the
+    produced artifact files. The key covers everything that can change
+    the output: model content, target, network name, toolchain and flags.
+
+    The directory mtime doubles as the LRU timestamp, so the order
+    survives restarts without a separate index file.
+
+    Usage:
+        cache = CompileCache(Path("./cache/compile"), max_bytes=2 * 1024**3)
+        key = cache.make_key(digest, "stm32f4", "nn_12", toolchain, flags)
+
+        if cache.get(key):
+            files = cache.files(key)
+        else:
+            ...  # run stedgeai
+            cache.put(key, artifacts)
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._scan()
+
+    @staticmethod
+    def make_key(
+        model_digest: str,
+        target: str,
+        network: str,
+        toolchain: str,
+        flags: Iterable[str]
+    ) -> str:
+        """Stable hash over every input that affects the generated code"""
+        material = json.dumps({
+            "model": model_digest,
+            "target": target,
+            "network": network,
+            "toolchain": toolchain,
+            "flags": list(flags),
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Look up an entry and mark it as recently used
+
+        Returns:
+            Entry directory on hit, None on miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            entry_dir = self.root / key
+
+            if entry is None or not entry_dir.is_dir():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            now = time.time()
+            entry["last_access"] = now
+            os.utime(entry_dir, (now, now))
+            self.hits += 1
+
+        logger.info(f"⚡ Compile cache hit {key[:12]}")
+        return entry_dir
+
+    def contains(self, key: str) -> bool:
+        """Whether an entry exists (no stats, no access time update)"""
+        with self._lock:
+            return key in self._entries
+
+    def files(self, key: str) -> List[Path]:
+        """Artifact paths of an entry"""
+        entry_dir = self.root / key
+        return sorted(f for f in entry_dir.iterdir() if f.is_file())
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, files: List[Path]) -> Path:
+        """
+        Store a set of artifacts under key
+
+        Files are copied into a temp directory first and renamed into
+        place, so a crash never leaves a half-written entry behind.
+        """
+        entry_dir = self.root / key
+        tmp_dir = self.root / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp_dir.mkdir(parents=True)
+
+        size = 0
+        for f in files:
+            shutil.copy2(f, tmp_dir / f.name)
+            size += f.stat().st_size
+
+        with self._lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            self._entries[key] = {"size": size, "last_access": time.time()}
+            self._evict()
+
+        logger.info(f"💾 Cached {len(files)} artifacts ({size} bytes) as {key[:12]}")
+        return entry_dir
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            for key in list(self._entries):
+                shutil.rmtree(self.root / key, ignore_errors=True)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _scan(self):
+        """Rebuild the in-memory index from disk"""
+        for entry_dir in self.root.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            if entry_dir.name.startswith("."):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+
+            size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            self._entries[entry_dir.name] = {
+                "size": size,
+                "last_access": entry_dir.stat().st_mtime,
+            }
+
+        logger.debug(f"🔧 Compile cache: {len(self._entries)} entries in {self.root}")
+
+    def _evict(self):
+        """Drop least recently used entries until under budget (caller holds the lock)"""
+        total = sum(e["size"] for e in self._entries.values())
+        by_age = sorted(self._entries.items(), key=lambda kv: kv[1]["last_access"])
+
+        for key, entry in by_age:
+            if total <= self.max_bytes or len(self._entries) <= 1:
+                break
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            del self._entries[key]
+            total -= entry["size"]
+            self.evictions += 1
+            logger.info(f"🗑️ Evicted compile cache entry {key[:12]}")
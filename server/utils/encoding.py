@@ -0,0 +1,188 @@
+import gzip
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.archive import zstandard
+
+logger = logging.getLogger(__name__)
+
+# Pre-compressed variants live in a hidden folder next to the artifacts,
+# so listings, archives and the catalog never see them
+ENCODED_DIR = ".encoded"
+
+# encoding name -> sidecar suffix, in order of preference
+SUFFIXES = {
+    "zstd": ".zst",
+    "gzip": ".gz",
+}
+
+# Files smaller than this are sent as they are
+MIN_COMPRESS_SIZE = 1024
+
+
+def available_encodings() -> List[str]:
+    return [name for name in SUFFIXES if name != "zstd" or zstandard is not None]
+
+
+def compress_bytes(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress a whole body; best=True trades CPU for size (publish time)"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=19 if best else 3).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """
+    Encodings a client accepts, best first
+
+    Parses q-values of an Accept-Encoding header; ties are broken by
+    server preference (zstd before gzip).
+    """
+    if not accept_encoding:
+        return []
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    def weight(name: str) -> float:
+        return weights.get(name, weights.get("*", 0.0))
+
+    preferred = [name for name in available_encodings() if weight(name) > 0]
+    return sorted(preferred, key=weight, reverse=True)
+
+
+# ----------------------------------------------------------------------
+# Pre-compressed artifacts
+# ----------------------------------------------------------------------
+
+def precompress(directory: Path, min_size: int = MIN_COMPRESS_SIZE) -> int:
+    """
+    Write compressed variants of every file in a directory
+
+    Called once at publish time, so downloads only pay for a file read.
+    Variants that do not save at least 10% are not kept.
+
+    Returns:
+        Number of variants written
+    """
+    encoded_dir = directory / ENCODED_DIR
+    written = 0
+
+    for f in sorted(directory.iterdir()):
+        if not f.is_file() or f.stat().st_size < min_size:
+            continue
+        data = f.read_bytes()
+        for encoding in available_encodings():
+            packed = compress_bytes(data, encoding, best=True)
+            if len(packed) > 0.9 * len(data):
+                continue
+            encoded_dir.mkdir(exist_ok=True)
+            (encoded_dir / f"{f.name}{SUFFIXES[encoding]}").write_bytes(packed)
+            written += 1
+
+    logger.debug(f"🔧 Pre-compressed {written} variants in {directory}")
+    return written
+
+
+def encoded_variant(path: Path, accept_encoding: Optional[str]) -> Tuple[Optional[str], Path]:
+    """
+    Best pre-compressed variant of a file for a client
+
+    A variant older than its source (file changed after publishing) is
+    ignored.
+
+    Returns:
+        (encoding, path) of the variant, or (None, path) for the file itself
+    """
+    source_mtime = path.stat().st_mtime_ns
+    for encoding in accepted_encodings(accept_encoding):
+        variant = path.parent / ENCODED_DIR / f"{path.name}{SUFFIXES[encoding]}"
+        try:
+            if variant.stat().st_mtime_ns >= source_mtime:
+                return encoding, variant
+        except FileNotFoundError:
+            continue
+    return None, path
+
+
+# ----------------------------------------------------------------------
+# JSON responses
+# ----------------------------------------------------------------------
+
+class CompressionMiddleware(object):
+    """Negotiated gzip/zstd compression of JSON responses
+
+    Only complete application/json bodies above minimum_size are touched;
+    file downloads and streamed archives bring their own encoding.
+
+    Usage:
+        app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        if not accepted:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip()
+                passthrough = media_type != "application/json" or "content-encoding" in headers
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small JSON goes out unchanged
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            encoding = accepted[0]
+            body = compress_bytes(body, encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
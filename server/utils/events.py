@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (sequence number, event name, payload); None tells subscribers the stream ended
+Event = Tuple[int, str, dict]
+
+
+def format_sse(event: Event) -> str:
+    """One Server-Sent Events message"""
+    seq, name, data = event
+    return f"id: {seq}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobEvents(object):
+    """Per-job event streams for Server-Sent Events
+
+    Producers (job queue, stedgeai output callback) publish from the event
+    loop; every job keeps a bounded backlog so a client connecting late, or
+    reconnecting with Last-Event-ID, first gets what it missed. Backlogs of
+    finished jobs are kept for the last `keep_closed` jobs.
+
+    Usage:
+        events = JobEvents()
+        events.publish(job.id, "state", {"status": "running"})
+        events.close(job.id)
+
+        async for message in events.stream(job_id, last_id=0):
+            ...   # "id: 3\\nevent: state\\ndata: {...}\\n\\n"
+    """
+
+    def __init__(self, backlog: int = 2000, keep_closed: int = 200, subscriber_queue: int = 1000):
+        self.backlog = backlog
+        self.keep_closed = keep_closed
+        self.subscriber_queue = subscriber_queue
+
+        self._events: Dict[str, Deque[Event]] = {}
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._closed: "OrderedDict[str, bool]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def publish(self, job_id: str, name: str, data: dict):
+        if job_id in self._closed:
+            return
+        seq = self._seq.get(job_id, 0) + 1
+        self._seq[job_id] = seq
+        event = (seq, name, data)
+
+        self._events.setdefault(job_id, deque(maxlen=self.backlog)).append(event)
+        for queue in self._subscribers.get(job_id, []):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass    # slow client, it can catch up with Last-Event-ID
+
+    def close(self, job_id: str):
+        """No more events for this job; open streams end after draining"""
+        self._closed[job_id] = True
+        for queue in self._subscribers.pop(job_id, []):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+        while len(self._closed) > self.keep_closed:
+            old, _ = self._closed.popitem(last=False)
+            self._events.pop(old, None)
+            self._seq.pop(old, None)
+
+    def known(self, job_id: str) -> bool:
+        return job_id in self._events or job_id in self._closed
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    async def stream(self, job_id: str, last_id: int = 0, heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """
+        SSE messages of one job until it is closed
+
+        Args:
+            job_id: Job to follow
+            last_id: Skip events up to this id (Last-Event-ID on reconnect)
+            heartbeat: Seconds between keep-alive comments while idle
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue)
+        closed = job_id in self._closed
+        if not closed:
+            self._subscribers.setdefault(job_id, []).append(queue)
+
+        try:
+            sent = last_id
+            for event in list(self._events.get(job_id, [])):
+                if event[0] > sent:
+                    sent = event[0]
+                    yield format_sse(event)
+            if closed:
+                return
+
+            while True:
+                try:
+                    event: Optional[Event] = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                if event[0] > sent:
+                    sent = event[0]
+                    yield format_sse(event)
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
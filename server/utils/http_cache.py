@@ -0,0 +1,58 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from utils.model_store import file_digest
+
+logger = logging.getLogger(__name__)
+
+# (path, size, mtime_ns) -> etag, bounded LRU
+_etags: "OrderedDict[tuple, str]" = OrderedDict()
+_etags_lock = threading.Lock()
+_ETAG_CACHE_SIZE = 4096
+
+
+def content_etag(path: Path) -> str:
+    """
+    Strong ETag from the SHA-256 of a file's content
+
+    The hash is memoized per (path, size, mtime), so a file is only read
+    again after it changed.
+    """
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns)
+
+    with _etags_lock:
+        if key in _etags:
+            _etags.move_to_end(key)
+            return _etags[key]
+
+    etag = f'"{file_digest(path)}"'
+
+    with _etags_lock:
+        _etags[key] = etag
+        while len(_etags) > _ETAG_CACHE_SIZE:
+            _etags.popitem(last=False)
+
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an ETag
+
+    Uses the weak comparison required for If-None-Match (RFC 9110 13.1.2),
+    so W/"x" matches "x".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in if_none_match.split(","))
@@ -0,0 +1,174 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    digest      TEXT,
+    target      TEXT,
+    name        TEXT,
+    params      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    duration_s  REAL,
+    exit_code   INTEGER,
+    error       TEXT,
+    result      TEXT,
+    attached    INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS jobs_digest ON jobs (digest, created_at);
+"""
+
+MAX_QUERY_LIMIT = 1000
+
+
+class JobStore(object):
+    """SQLite record of every generate job
+
+    One row per job with the request parameters, timestamps, run time,
+    stedgeai exit code, error and result (artifact names and URLs). The
+    JobQueue writes a row on every state change, so the history survives
+    restarts and jobs that were queued or running when the server stopped
+    can be picked up again.
+
+    Usage:
+        store = JobStore(Path("./cache/jobs.sqlite3"))
+        store.save(job)
+        store.query(status="failed", since=time.time() - 3600)
+        store.unfinished()   # on startup
+    """
+
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+
+    def save(self, job):
+        """Insert or update the row of a Job"""
+        info = job.to_dict()
+        duration = info["timings"].get("run_s")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, digest, target, name, params, created_at, "
+                "started_at, finished_at, duration_s, exit_code, error, result, attached) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.status,
+                    job.params.get("digest"), job.params.get("target"), job.params.get("name"),
+                    json.dumps(job.params), job.created_at, job.started_at, job.finished_at,
+                    duration, job.exit_code, job.error,
+                    json.dumps(job.result) if job.result is not None else None,
+                    job.attached,
+                )
+            )
+
+    def prune(self, max_age: float) -> int:
+        """Delete finished jobs older than max_age seconds"""
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM jobs WHERE created_at < ? AND status NOT IN ('queued', 'running')", (cutoff,)
+            ).rowcount
+        if removed:
+            logger.info(f"🗑️ Pruned {removed} old jobs from the job store")
+        return removed
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        digest: Optional[str] = None,
+        limit: int = 100
+    ) -> List[dict]:
+        """
+        Jobs matching all given filters, newest first
+
+        Args:
+            status: queued, running, succeeded, failed or cancelled
+            since: Only jobs created at or after this Unix time
+            digest: Only jobs for this model
+            limit: Maximum number of rows (1..MAX_QUERY_LIMIT)
+        """
+        clauses, args = [], []
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            args.append(since)
+        if digest:
+            clauses.append("digest = ?")
+            args.append(digest)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        args.append(max(1, min(limit, MAX_QUERY_LIMIT)))
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", args
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def unfinished(self) -> List[dict]:
+        """Jobs that were queued or running when the server stopped, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        """Same shape as Job.to_dict()"""
+        timings = {}
+        if row["started_at"]:
+            timings["queued_s"] = round(row["started_at"] - row["created_at"], 3)
+        if row["duration_s"] is not None:
+            timings["run_s"] = row["duration_s"]
+
+        return {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "timings": timings,
+            "exit_code": row["exit_code"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "cancel_requested": False,
+            "attached": row["attached"],
+        }
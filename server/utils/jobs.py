@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from utils.events import JobEvents
+from utils.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def new_job_id() -> str:
+    """Timestamp for readability plus a random suffix so ids never collide"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class Job:
+    """A single generate run and its bookkeeping"""
+    id: str
+    params: dict
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    exit_code: Optional[int] = None
+    cancel_requested: bool = False
+    attached: int = 0
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> dict:
+        timings = {}
+        if self.started_at:
+            timings["queued_s"] = round(self.started_at - self.created_at, 3)
+        if self.started_at and self.finished_at:
+            timings["run_s"] = round(self.finished_at - self.started_at, 3)
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": timings,
+            "exit_code": self.exit_code,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "attached": self.attached,
+        }
+
+
+class JobQueue(object):
+    """Bounded worker pool for generate jobs
+
+    Jobs are queued on an asyncio.Queue and picked up by a fixed number
+    of worker tasks. The handler is a coroutine that must not block the
+    event loop; each job runs in its own task so it can be cancelled.
+
+    With a key function, identical requests arriving while a matching
+    job is still queued or running attach to that job instead of
+    starting a second one (single-flight).
+
+    With a JobStore every state change is written to SQLite, and jobs
+    that were queued or running when the server stopped are queued again
+    (same id) on start().
+
+    With JobEvents every state change is published as a "state" event
+    (the stream is closed once the job finished).
+
+    submit(params, inline=True) runs a job in its own task right away,
+    outside the worker pool (used for compile cache hits).
+
+    Usage:
+        queue = JobQueue(handler=run_generate, workers=2, store=JobStore(...))
+        await queue.start()                   # in lifespan startup
+        job, attached = queue.submit({...})   # returns immediately
+        await queue.stop()                    # in lifespan shutdown
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Job], Awaitable[dict]],
+        workers: int = 1,
+        history: int = 1000,
+        key: Optional[Callable[[dict], Hashable]] = None,
+        store: Optional[JobStore] = None,
+        events: Optional[JobEvents] = None
+    ):
+        """
+        Args:
+            handler: Coroutine function doing the work, returns the job result
+            workers: Number of jobs allowed to run at the same time
+            history: Finished jobs kept in memory for GET /jobs/{id}
+            key: Maps job params to an identity for coalescing (None = never coalesce)
+            store: Optional persistent job record
+            events: Optional event streams, fed with every state change
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.history = history
+        self.key = key
+        self.store = store
+        self.events = events
+        self.coalesced = 0
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._inflight: Dict[Hashable, str] = {}
+        self._inline: Set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"⚙️ Job queue started with {self.workers} worker(s)")
+
+        if self.store is not None:
+            self._recover()
+
+    async def stop(self):
+        tasks = self._tasks + list(self._inline)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("⚙️ Job queue stopped")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, params: dict, inline: bool = False) -> Tuple[Job, bool]:
+        """
+        Create a job and queue it, or attach to an identical one in flight
+
+        Args:
+            params: Job parameters for the handler
+            inline: Start right away without waiting for a worker, for
+                cheap jobs (e.g. compile cache hits) that must not queue
+                behind long running ones
+
+        Returns:
+            (job, attached) - attached is True if an existing job was reused
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+
+        job = self.inflight(params)
+        if job is not None:
+            job.attached += 1
+            self.coalesced += 1
+            self._changed(job)
+            logger.info(f"🔗 Attached to in-flight job {job.id} ({job.status})")
+            return job, True
+
+        job = Job(id=new_job_id(), params=params)
+        if inline:
+            self._enqueue(job, queue=False)
+            task = asyncio.create_task(self._run(job), name=f"job-inline-{job.id}")
+            self._inline.add(task)
+            task.add_done_callback(self._inline.discard)
+            logger.info(f"⚡ Started job {job.id} inline")
+        else:
+            self._enqueue(job)
+            logger.info(f"📥 Queued job {job.id} ({self.pending()} waiting)")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def inflight(self, params: dict) -> Optional[Job]:
+        """The queued or running job submit(params) would attach to, if any"""
+        key = self.key(params) if self.key else None
+        job_id = self._inflight.get(key) if key is not None else None
+        return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job
+
+        Queued jobs are skipped when a worker picks them up; running jobs
+        have their task cancelled, which kills the stedgeai process.
+
+        Returns:
+            The job, or None if unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+
+        job.cancel_requested = True
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._release(job)
+            self._changed(job)
+            job.done.set()
+
+        logger.info(f"🛑 Cancel requested for job {job_id}")
+        return job
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def running(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == RUNNING)
+
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "pending": self.pending(),
+            "coalesced": self.coalesced,
+            "jobs": counts,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        if job.cancel_requested:
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._changed(job)
+        logger.info(f"▶️ Job {job.id} started")
+
+        task = asyncio.create_task(self.handler(job))
+        self._running[job.id] = task
+        try:
+            job.result = await task
+            job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                # Worker itself is shutting down: leave the job running in
+                # the store so it is queued again after the restart
+                job.status = CANCELLED
+                job.error = "Server shutdown"
+                raise
+            job.status = CANCELLED
+            job.error = "Cancelled"
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._running.pop(job.id, None)
+            self._release(job)
+            if job.cancel_requested or job.status != CANCELLED:
+                self._changed(job)
+            job.done.set()
+
+        logger.info(f"⏹️ Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def _enqueue(self, job: Job, queue: bool = True):
+        key = self.key(job.params) if self.key else None
+        self._jobs[job.id] = job
+        if key is not None:
+            self._inflight[key] = job.id
+        if queue:
+            self._queue.put_nowait(job)
+        self._changed(job)
+        self._trim()
+
+    def _changed(self, job: Job):
+        """Record a state change and tell event subscribers"""
+        if self.store is not None:
+            self.store.save(job)
+        if self.events is not None:
+            self.events.publish(job.id, "state", job.to_dict())
+            if job.status in FINISHED:
+                self.events.close(job.id)
+
+    def _recover(self):
+        """Queue jobs again that a previous run left queued or running"""
+        for row in self.store.unfinished():
+            job = Job(id=row["job_id"], params=row["params"], created_at=row["created_at"])
+            self._enqueue(job)
+            logger.info(f"♻️ Re-queued interrupted job {job.id} (was {row['status']})")
+
+    def _release(self, job: Job):
+        """Stop routing new identical requests to a finished job"""
+        if self.key is None:
+            return
+        key = self.key(job.params)
+        if self._inflight.get(key) == job.id:
+            del self._inflight[key]
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        excess = len(self._jobs) - self.history
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in FINISHED:
+                del self._jobs[job_id]
+                excess -= 1
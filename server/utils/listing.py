@@ -0,0 +1,122 @@
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ("name", "mtime", "size")
+MAX_PAGE_SIZE = 1000
+
+
+def _encode_cursor(value, name: str, sort: str, order: str) -> str:
+    raw = json.dumps([sort, order, value, name]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    """(sort value, name) of a cursor made for this sort and order"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+        if not isinstance(value, list) or len(value) != 4:
+            raise ValueError(value)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+    cursor_sort, cursor_order, after, name = value
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise HTTPException(status_code=400, detail=f"Cursor was issued for sort={cursor_sort}, order={cursor_order}")
+    if sort == "name":
+        typed = isinstance(after, str)
+    else:
+        typed = isinstance(after, (int, float)) and not isinstance(after, bool)
+    if not typed or not isinstance(name, str):
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+    return after, name
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def keyset_page(
+    conn: sqlite3.Connection,
+    lock: threading.Lock,
+    table: str,
+    columns: Dict[str, str],
+    to_item: Callable[[sqlite3.Row], dict],
+    sort: str = "name",
+    order: str = "asc",
+    prefix: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    where: str = "",
+    args: tuple = ()
+) -> dict:
+    """
+    Filter, sort and cut one page out of an SQLite table
+
+    Ordering, prefix filter and limit run in SQL on an index per sort key,
+    so a page costs O(page) regardless of the table size. Pagination is
+    keyset based: the cursor encodes the (sort value, name) of the last
+    row sent, so pages stay stable while rows are added. It also records
+    sort and order; reusing it with others is a 400.
+
+    Args:
+        conn, lock: Connection of the owning store and the lock guarding it
+        table: Table to list
+        columns: Column for each of SORT_KEYS ("name" is also the tie breaker)
+        to_item: Turns a row into a response entry
+        sort: "name", "mtime" or "size"
+        order: "asc" or "desc"
+        prefix: Only names starting with this
+        cursor: next_cursor of the previous page
+        limit: Page size (1..MAX_PAGE_SIZE)
+        where, args: Additional filter, e.g. ("job_id = ?", (job_id,))
+
+    Returns:
+        {"items": [...], "total": n, "next_cursor": str | None}
+
+    Raises:
+        HTTPException: 400 on invalid parameters
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {SORT_KEYS}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    name, key = columns["name"], columns[sort]
+    clauses, params = ([where] if where else []), list(args)
+    if prefix:
+        clauses.append(f"{name} >= ? AND {name} < ?")
+        params += [prefix, _prefix_end(prefix)]
+    filtered = " AND ".join(clauses) or "1"
+
+    # (key, name) for mtime / size, just name when sorting by name
+    keys = [key, name] if key != name else [name]
+    direction = "DESC" if order == "desc" else "ASC"
+    page_filter, page_params = filtered, list(params)
+    if cursor:
+        after = _decode_cursor(cursor, sort, order)
+        page_filter += f" AND ({', '.join(keys)}) {'<' if order == 'desc' else '>'} ({', '.join('?' * len(keys))})"
+        page_params += list(after[-len(keys):])
+
+    with lock:
+        total = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {filtered}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE {page_filter} ORDER BY {', '.join(f'{k} {direction}' for k in keys)} LIMIT ?",
+            page_params + [limit + 1]
+        ).fetchall()
+
+    page = rows[:limit]
+    next_cursor = _encode_cursor(page[-1][key], page[-1][name], sort, order) if len(rows) > limit else None
+
+    return {"items": [to_item(r) for r in page], "total": total, "next_cursor": next_cursor}
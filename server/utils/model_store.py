@@ -0,0 +1,315 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.listing import keyset_page
+from utils.tflite import VALIDATOR_VERSION, TFLiteError, inspect_tflite
+
+logger = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Listing index of the filenames (index.json stays the source of truth)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    name   TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS uploads_digest ON uploads (digest);
+CREATE INDEX IF NOT EXISTS uploads_mtime ON uploads (mtime, name);
+CREATE INDEX IF NOT EXISTS uploads_size ON uploads (size, name);
+"""
+
+
+def is_digest(value: str) -> bool:
+    """True if value looks like a lowercase hex SHA-256 digest"""
+    return bool(DIGEST_RE.match(value or ""))
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ModelStore(object):
+    """Content-addressed store for uploaded models
+
+    Every model is stored exactly once as blobs/<sha256>.tflite.
+    A small JSON index maps client filenames to digests, so the
+    same .tflite uploaded by many clients costs one blob on disk.
+
+    Models are validated once (see check()); the parsed metadata is kept
+    next to the blob and digests that failed are remembered, so a bad
+    model is refused without parsing it again. Rejections are kept per
+    VALIDATOR_VERSION, so models refused by an older validator are
+    checked again after an update.
+
+    Layout:
+        UPLOAD_DIR/
+            blobs/<digest>.tflite
+            meta/<digest>.json       parsed model metadata
+            meta/uploads.sqlite3     filenames with size and upload time, for listings
+            meta/rejected_v<N>.json  {"<digest>": "reason", ...} of VALIDATOR_VERSION N
+            index.json               {"model_12.tflite": "<digest>", ...}
+            .tmp/                    partial uploads
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.blob_dir = root / "blobs"
+        self.meta_dir = root / "meta"
+        self.tmp_dir = root / ".tmp"
+        self.index_file = root / "index.json"
+        self.rejected_file = self.meta_dir / f"rejected_v{VALIDATOR_VERSION}.json"
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, str] = self._load_index()
+        self._rejected: Dict[str, str] = self._load_json(self.rejected_file)
+
+        self._db = sqlite3.connect(str(self.meta_dir / "uploads.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._reindex()
+        self._import_legacy()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / f"{digest}.tflite"
+
+    def has(self, digest: str) -> bool:
+        return is_digest(digest) and self.blob_path(digest).is_file()
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Digest for a client filename, or None"""
+        with self._lock:
+            return self._index.get(name)
+
+    def names_for(self, digest: str) -> List[str]:
+        """All filenames that point at a digest"""
+        with self._lock:
+            return sorted(n for n, d in self._index.items() if d == digest)
+
+    def names(self) -> Dict[str, str]:
+        """Copy of the name -> digest index"""
+        with self._lock:
+            return dict(self._index)
+
+    def page(self, sort: str = "name", order: str = "asc", prefix: Optional[str] = None,
+             cursor: Optional[str] = None, limit: int = 100) -> dict:
+        """One page of the filenames with digest, size and upload time (see keyset_page)"""
+        return keyset_page(
+            self._db, self._lock, "uploads", {"name": "name", "mtime": "mtime", "size": "size"},
+            dict, sort, order, prefix, cursor, limit
+        )
+
+    def metadata(self, digest: str) -> Optional[dict]:
+        """Parsed model metadata, None if the model was never checked"""
+        meta_file = self.meta_dir / f"{digest}.json"
+        if not is_digest(digest) or not meta_file.is_file():
+            return None
+        return json.loads(meta_file.read_text())
+
+    def rejected(self, digest: str) -> Optional[str]:
+        """Reason a digest failed validation, None if it is not known bad"""
+        with self._lock:
+            return self._rejected.get(digest)
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def check(self, path: Path, digest: str) -> dict:
+        """
+        Validate a model file and remember the outcome for its digest
+
+        Args:
+            path: Temp file of an upload or the stored blob
+            digest: SHA-256 of path
+
+        Returns:
+            Model metadata (operators, tensor types, input/output shapes)
+
+        Raises:
+            TFLiteError: If the model is invalid (digest is recorded as bad)
+        """
+        reason = self.rejected(digest)
+        if reason:
+            raise TFLiteError(reason)
+
+        meta = self.metadata(digest)
+        if meta is not None:
+            return meta
+
+        try:
+            meta = inspect_tflite(path)
+        except TFLiteError as e:
+            with self._lock:
+                self._rejected[digest] = str(e)
+                self._save_json(self.rejected_file, self._rejected)
+            logger.warning(f"⚠️ Rejected model {digest[:12]}: {e}")
+            raise
+
+        self._save_json(self.meta_dir / f"{digest}.json", meta)
+        logger.debug(f"🔧 Model {digest[:12]}: {len(meta['operators'])} operator types, "
+                     f"inputs {[t['shape'] for t in meta['inputs']]}")
+        return meta
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+
+    def add(self, tmp_path: Path, digest: str, name: Optional[str] = None) -> bool:
+        """
+        Move a fully written temp file into the store
+
+        Args:
+            tmp_path: Temp file (same filesystem as the store)
+            digest: SHA-256 of tmp_path
+            name: Optional client filename to index
+
+        Returns:
+            True if the blob already existed (upload was a duplicate)
+        """
+        blob = self.blob_path(digest)
+
+        with self._lock:
+            duplicate = blob.is_file()
+            if duplicate:
+                tmp_path.unlink(missing_ok=True)
+            else:
+                os.replace(tmp_path, blob)
+
+            if name and self._index.get(name) != digest:
+                self._index[name] = digest
+                self._save_index()
+            if name:
+                self._list(name, digest)
+
+        if duplicate:
+            logger.info(f"♻️ Duplicate upload, reusing blob {digest[:12]}")
+        else:
+            logger.info(f"💾 Stored new blob {digest[:12]}")
+        return duplicate
+
+    def link(self, name: str, digest: str):
+        """Point a filename at an existing blob"""
+        if not self.has(digest):
+            raise FileNotFoundError(f"Unknown model digest: {digest}")
+        with self._lock:
+            if self._index.get(name) != digest:
+                self._index[name] = digest
+                self._save_index()
+                self._list(name, digest)
+
+    def remove(self, digest: str) -> int:
+        """
+        Delete a blob and every filename pointing at it
+
+        Returns:
+            Bytes freed (0 if the blob did not exist)
+        """
+        blob = self.blob_path(digest)
+        with self._lock:
+            try:
+                size = blob.stat().st_size
+                blob.unlink()
+            except FileNotFoundError:
+                size = 0
+
+            (self.meta_dir / f"{digest}.json").unlink(missing_ok=True)
+
+            names = [n for n, d in self._index.items() if d == digest]
+            for name in names:
+                del self._index[name]
+            if names:
+                self._save_index()
+            with self._db:
+                self._db.execute("DELETE FROM uploads WHERE digest = ?", (digest,))
+
+        logger.info(f"🗑️ Removed blob {digest[:12]} ({size} bytes, names: {names})")
+        return size
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, str]:
+        return self._load_json(self.index_file)
+
+    def _save_index(self):
+        """Write index atomically (caller holds the lock)"""
+        self._save_json(self.index_file, self._index)
+
+    def _list(self, name: str, digest: str, mtime: Optional[float] = None):
+        """Add or update the listing row of a filename (caller holds the lock)"""
+        st = self.blob_path(digest).stat()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads (name, digest, size, mtime) VALUES (?, ?, ?, ?)",
+                (name, digest, st.st_size, time.time() if mtime is None else mtime)
+            )
+
+    def _reindex(self):
+        """Bring the listing table in line with index.json (on startup)"""
+        with self._lock:
+            listed = {r["name"]: r["digest"] for r in self._db.execute("SELECT name, digest FROM uploads")}
+            with self._db:
+                self._db.executemany(
+                    "DELETE FROM uploads WHERE name = ?",
+                    [(n,) for n, d in listed.items() if self._index.get(n) != d]
+                )
+            for name, digest in self._index.items():
+                if listed.get(name) == digest:
+                    continue
+                try:
+                    self._list(name, digest, mtime=self.blob_path(digest).stat().st_mtime)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _load_json(path: Path) -> dict:
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except Exception as e:
+            logger.error(f"❌ Could not read {path}: {e}")
+            return {}
+
+    @staticmethod
+    def _save_json(path: Path, data: dict):
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+        os.replace(tmp, path)
+
+    def _import_legacy(self):
+        """Move plain files left by the old /upload into the store"""
+        legacy = [
+            f for f in self.root.iterdir()
+            if f.is_file() and not f.name.startswith(self.index_file.name)
+        ]
+        for f in legacy:
+            digest = file_digest(f)
+            logger.info(f"📦 Importing legacy upload {f.name} -> {digest[:12]}")
+            self.add(f, digest, f.name)
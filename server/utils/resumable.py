@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from utils.model_store import ModelStore, file_digest
+from utils.tflite import TFLiteError
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessions(object):
+    """Resumable chunked uploads
+
+    A session is a partial file plus a small JSON sidecar on disk, so an
+    upload survives dropped connections and server restarts. The size of
+    the partial file is the committed offset: after a drop the client
+    asks for it and continues from there, re-sending at most the chunk
+    that was in flight.
+
+    Protocol:
+        POST   /uploads                   create, returns upload_id
+        PUT    /uploads/{id}?offset=N     append raw bytes at offset N
+        HEAD   /uploads/{id}              committed offset (Upload-Offset header)
+        POST   /uploads/{id}/complete     verify digest, move into the model store
+        DELETE /uploads/{id}              abort
+
+    Layout:
+        UPLOAD_DIR/.sessions/<id>.part
+        UPLOAD_DIR/.sessions/<id>.json
+    """
+
+    def __init__(self, store: ModelStore, max_size: int, max_age: float = 24 * 3600):
+        """
+        Args:
+            store: Model store receiving finished uploads
+            max_size: Upper limit for a single upload in bytes
+            max_age: Sessions untouched for longer than this are removed
+        """
+        self.store = store
+        self.max_size = max_size
+        self.max_age = max_age
+        self.root = store.root / ".sessions"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._busy: Dict[str, bool] = {}
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+
+    def create(self, filename: str, size: Optional[int] = None, digest: Optional[str] = None) -> dict:
+        """Start a new session"""
+        if size is not None and size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"File too large (limit {self.max_size} bytes)")
+
+        self.cleanup()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "digest": digest,
+            "created_at": time.time(),
+        }
+        self._part(upload_id).touch()
+        self._save_meta(meta)
+
+        logger.info(f"📤 Upload session {upload_id} for {filename} ({size} bytes)")
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> dict:
+        meta = self._load_meta(upload_id)
+        return {**meta, "offset": self._part(upload_id).stat().st_size}
+
+    def abort(self, upload_id: str):
+        self._load_meta(upload_id)
+        self._remove(upload_id)
+        logger.info(f"🗑️ Upload session {upload_id} aborted")
+
+    def cleanup(self):
+        """Remove sessions that have not been written to for max_age"""
+        cutoff = time.time() - self.max_age
+        for meta_file in self.root.glob("*.json"):
+            upload_id = meta_file.stem
+            part = self._part(upload_id)
+            last = part.stat().st_mtime if part.exists() else meta_file.stat().st_mtime
+            if last < cutoff and not self._busy.get(upload_id):
+                logger.info(f"🗑️ Expired upload session {upload_id}")
+                self._remove(upload_id)
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    async def append(self, upload_id: str, offset: int, body: AsyncIterator[bytes], chunk_size: int) -> int:
+        """
+        Append a request body at offset
+
+        Args:
+            upload_id: Session id
+            offset: Where the client thinks the file ends (must match)
+            body: Request body stream
+            chunk_size: Bytes buffered before each disk write
+
+        Returns:
+            New committed offset
+
+        Raises:
+            HTTPException: 404 unknown session, 409 offset mismatch or
+                concurrent write, 413 size limit exceeded
+        """
+        meta = self._load_meta(upload_id)
+        if self._busy.get(upload_id):
+            raise HTTPException(status_code=409, detail="Another chunk is being written")
+
+        part = self._part(upload_id)
+        committed = part.stat().st_size
+        if offset != committed:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset mismatch: expected {committed}, got {offset}",
+                headers={"Upload-Offset": str(committed)}
+            )
+
+        limit = meta["size"] if meta["size"] is not None else self.max_size
+        self._busy[upload_id] = True
+        fh = await run_in_threadpool(open, part, "ab")
+        try:
+            buffer = bytearray()
+            async for data in body:
+                committed += len(data)
+                if committed > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {limit} bytes")
+                buffer += data
+                if len(buffer) >= chunk_size:
+                    await run_in_threadpool(fh.write, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await run_in_threadpool(fh.write, bytes(buffer))
+        finally:
+            # Whatever reached the file stays committed, even on a dropped connection
+            await run_in_threadpool(fh.close)
+            self._busy.pop(upload_id, None)
+
+        return part.stat().st_size
+
+    async def complete(self, upload_id: str, digest: Optional[str] = None) -> dict:
+        """
+        Verify the finished file and move it into the model store
+
+        Returns:
+            Upload result (filename, digest, size, deduplicated)
+
+        Raises:
+            HTTPException: 409 if incomplete, 422 on digest mismatch or
+                an invalid model (the session is removed then)
+        """
+        meta = self._load_meta(upload_id)
+        if self._busy.get(upload_id):
+            raise HTTPException(status_code=409, detail="A chunk is still being written")
+
+        part = self._part(upload_id)
+        size = part.stat().st_size
+        if meta["size"] is not None and size != meta["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {size} of {meta['size']} bytes",
+                headers={"Upload-Offset": str(size)}
+            )
+
+        actual = await run_in_threadpool(file_digest, part)
+        expected = digest or meta["digest"]
+        if expected and actual != expected:
+            logger.error(f"❌ Digest mismatch for {upload_id}: {actual} != {expected}")
+            raise HTTPException(status_code=422, detail=f"Digest mismatch: got {actual}")
+
+        try:
+            model = await run_in_threadpool(self.store.check, part, actual)
+        except TFLiteError as e:
+            await run_in_threadpool(self._remove, upload_id)
+            raise HTTPException(status_code=422, detail=f"Invalid TFLite model: {e}")
+
+        duplicate = await run_in_threadpool(self.store.add, part, actual, meta["filename"])
+        await run_in_threadpool(self._remove, upload_id)
+
+        logger.info(f"✅ Upload session {upload_id} complete ({size} bytes)")
+        return {
+            "filename": meta["filename"],
+            "digest": actual,
+            "size": size,
+            "deduplicated": duplicate,
+            "path": str(self.store.blob_path(actual).absolute()),
+            "model": model,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _part(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _load_meta(self, upload_id: str) -> dict:
+        meta_file = self._meta(upload_id)
+        if not upload_id.isalnum() or not meta_file.exists():
+            raise HTTPException(status_code=404, detail=f"Upload session not found: {upload_id}")
+        return json.loads(meta_file.read_text())
+
+    def _save_meta(self, meta: dict):
+        meta_file = self._meta(meta["upload_id"])
+        tmp = meta_file.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, meta_file)
+
+    def _remove(self, upload_id: str):
+        self._part(upload_id).unlink(missing_ok=True)
+        self._meta(upload_id).unlink(missing_ok=True)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from utils.catalog import ArtifactCatalog
+from utils.model_store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+# Last-use times are written to disk at most this often per path (seconds)
+PERSIST_INTERVAL = 60
+
+
+def _tree_size(path: Path) -> int:
+    """Bytes of all files below path (including hidden sidecars)"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.stat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class RetentionGC(object):
+    """Keeps UPLOAD_DIR and OUTPUT_DIR inside a byte and age budget
+
+    Candidates are model blobs and output directories. Each pass first
+    removes everything unused for longer than max_age, then the least
+    recently used entries until each area is under its byte budget.
+    Paths returned by in_use() (models and outputs of queued or running
+    jobs) are never removed; the check is repeated right before every
+    deletion.
+
+    "Used" means uploaded, compiled or downloaded. Use times are persisted
+    so they survive restarts: as the mtime of model blobs and in the
+    catalog for output directories (not their mtime, which the catalog
+    uses to detect changed folders). Persisting is rate limited to once
+    per path every PERSIST_INTERVAL seconds.
+
+    Usage:
+        gc = RetentionGC(MODEL_STORE, CATALOG, upload_max_bytes=..., output_max_bytes=...,
+                         max_age=30 * 86400, in_use=lambda: {...})
+        gc.touch(path)                   # on every use
+        report = gc.collect()            # one pass (blocking)
+        task = asyncio.create_task(gc.run(interval=900))
+    """
+
+    def __init__(
+        self,
+        store: ModelStore,
+        catalog: ArtifactCatalog,
+        upload_max_bytes: int,
+        output_max_bytes: int,
+        max_age: float,
+        in_use: Callable[[], Set[Path]]
+    ):
+        self.store = store
+        self.catalog = catalog
+        self.upload_max_bytes = upload_max_bytes
+        self.output_max_bytes = output_max_bytes
+        self.max_age = max_age
+        self.in_use = in_use
+
+        self._lock = threading.Lock()
+        self._last_used: Dict[Path, float] = {}
+        self._last_persisted: Dict[Path, float] = {}
+        self.last_report: Optional[dict] = None
+        self.runs = 0
+
+    def touch(self, path: Path):
+        """Mark a blob or output directory as just used"""
+        now = time.time()
+        self._last_used[path] = now
+        if now - self._last_persisted.get(path, 0.0) < PERSIST_INTERVAL:
+            return
+        self._last_persisted[path] = now
+
+        try:
+            if path.parent == self.catalog.root:
+                self.catalog.touch(path.name, now)
+            else:
+                os.utime(path, (now, now))
+        except (OSError, sqlite3.Error) as e:
+            logger.debug(f"Could not persist last use of {path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+
+    def collect(self) -> dict:
+        """
+        Run one GC pass
+
+        Returns:
+            Report with removed entries and freed bytes per area
+        """
+        with self._lock:
+            started = time.time()
+
+            uploads = self._sweep(
+                [(self.store.blob_path(d), d, 0.0) for d in self._blob_digests()],
+                self.upload_max_bytes,
+                remove=self.store.remove
+            )
+            usage = self.catalog.usage()
+            outputs = self._sweep(
+                [(self.catalog.root / job["name"], job["name"], usage.get(job["name"], 0.0))
+                 for job in self.catalog.jobs()],
+                self.output_max_bytes,
+                remove=self._remove_output
+            )
+
+            self.runs += 1
+            self.last_report = {
+                "ran_at": started,
+                "duration_s": round(time.time() - started, 3),
+                "uploads": uploads,
+                "outputs": outputs,
+            }
+
+        freed = uploads["freed_bytes"] + outputs["freed_bytes"]
+        if freed:
+            logger.info(f"🗑️ GC freed {freed} bytes "
+                        f"({len(uploads['removed'])} uploads, {len(outputs['removed'])} outputs)")
+        else:
+            logger.debug(f"🔧 GC: nothing to remove")
+        return self.last_report
+
+    async def run(self, interval: float):
+        """Collect every interval seconds until cancelled"""
+        while True:
+            try:
+                await asyncio.to_thread(self.collect)
+            except Exception as e:
+                logger.error(f"❌ GC pass failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "upload_max_bytes": self.upload_max_bytes,
+            "output_max_bytes": self.output_max_bytes,
+            "max_age": self.max_age,
+            "last_report": self.last_report,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _blob_digests(self) -> List[str]:
+        return [f.stem for f in self.store.blob_dir.glob("*.tflite")]
+
+    def _remove_output(self, name: str) -> int:
+        path = self.catalog.root / name
+        size = _tree_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        self.catalog.forget(name)
+        logger.info(f"🗑️ Removed output {name} ({size} bytes)")
+        return size
+
+    def _sweep(self, candidates: list, max_bytes: int, remove: Callable[[str], int]) -> dict:
+        """Age then LRU eviction over (path, id, persisted last use) candidates of one area"""
+        entries = []
+        for path, ident, persisted in candidates:
+            try:
+                size = path.stat().st_size if path.is_file() else _tree_size(path)
+                last_used = max(self._last_used.get(path, 0.0), persisted, path.stat().st_mtime)
+            except FileNotFoundError:
+                continue
+            entries.append({"path": path, "id": ident, "size": size, "last_used": last_used})
+
+        entries.sort(key=lambda e: e["last_used"])
+        total = sum(e["size"] for e in entries)
+        cutoff = time.time() - self.max_age
+
+        removed = []
+        freed = 0
+        for entry in entries:
+            if entry["last_used"] >= cutoff and total <= max_bytes:
+                break
+            if entry["path"] in self.in_use():
+                continue
+            size = remove(entry["id"])
+            self._last_used.pop(entry["path"], None)
+            self._last_persisted.pop(entry["path"], None)
+            total -= entry["size"]
+            freed += size
+            removed.append(entry["id"])
+
+        return {"removed": removed, "freed_bytes": freed, "kept": len(entries) - len(removed), "bytes": total}
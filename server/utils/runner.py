@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RunResult:
+    """Outcome of a finished (or killed) command"""
+    returncode: Optional[int]
+    duration: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+def _spawn_kwargs() -> dict:
+    """Start the child in its own process group so the whole tree can be killed"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(pid: int):
+    """Kill a process and everything it spawned"""
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, OSError) as e:
+        logger.debug(f"Kill of {pid} failed (already gone?): {e}")
+
+
+async def run_command(
+    cmd: List[str],
+    log_file: Path,
+    timeout: Optional[float] = None,
+    on_line: Optional[Callable[[str, str], None]] = None,
+    cwd: Optional[Path] = None
+) -> RunResult:
+    """
+    Run a command without blocking the event loop
+
+    stdout and stderr are streamed line by line into log_file while the
+    process runs. On timeout or cancellation the whole process group is
+    killed.
+
+    Args:
+        cmd: Command and arguments
+        log_file: File receiving "[stdout] ..." / "[stderr] ..." lines
+        timeout: Wall-clock limit in seconds (None = no limit)
+        on_line: Optional callback(stream_name, line) per output line
+        cwd: Working directory for the child
+
+    Returns:
+        RunResult
+
+    Raises:
+        asyncio.CancelledError: If the caller was cancelled (process is killed first)
+    """
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+
+    proc = await asyncio.create_subprocess_exec(
+        *[str(c) for c in cmd],
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(cwd) if cwd else None,
+        **_spawn_kwargs()
+    )
+    logger.debug(f"🔧 Started pid {proc.pid}: {' '.join(str(c) for c in cmd)}")
+
+    with open(log_file, "a", encoding="utf-8", buffering=1) as log:
+
+        async def pump(stream: asyncio.StreamReader, name: str):
+            async for raw in stream:
+                line = raw.decode(errors="replace").rstrip()
+                log.write(f"[{name}] {line}\n")
+                if on_line:
+                    on_line(name, line)
+
+        timed_out = False
+        work = asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"), proc.wait())
+        try:
+            await asyncio.wait_for(asyncio.shield(work), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.error(f"⏱️ pid {proc.pid} exceeded {timeout}s, killing process group")
+            kill_process_tree(proc.pid)
+            await work
+            log.write(f"[runner] timed out after {timeout}s, killed\n")
+        except asyncio.CancelledError:
+            logger.warning(f"🛑 Cancelled, killing pid {proc.pid}")
+            kill_process_tree(proc.pid)
+            await work
+            log.write("[runner] cancelled, killed\n")
+            raise
+
+        duration = time.monotonic() - started
+        log.write(f"[runner] exit code {proc.returncode} after {duration:.1f}s\n")
+
+    return RunResult(returncode=proc.returncode, duration=duration, timed_out=timed_out)
@@ -1,53 +1,329 @@
-from typing import TypedDict, Optional, Literal
+from typing import TypedDict, Optional, Literal, Callable, List
 from pathlib import Path
 from dataclasses import dataclass, field
 import subprocess
 import json
 import logging
+import re
+import threading
+import time
 from config import CONFIG_DIR
+from utils.runner import run_command, RunResult
+from utils.toolchain import ToolchainConfig
+from utils.backends import CompilerBackend
+from utils.model_store import file_digest
 
 logger = logging.getLogger(__name__)
 
+# Extra CLI flags for every generate run (part of the compile cache key)
+GENERATE_FLAGS = ["--allocate-inputs", "--allocate-outputs"]
+
+# Extra CLI flags for every analyze run (part of the report cache key)
+ANALYZE_FLAGS = []
+
+# "macc : 13,204" style summary lines of stedgeai analyze
+_SUMMARY_RE = re.compile(
+    r"^\s*(macc|weights \(ro\)|activations \(rw\)|ram \(total\))\s*:\s*([\d,]+)",
+    re.IGNORECASE | re.MULTILINE
+)
+_SUMMARY_KEYS = {
+    "macc": "macc",
+    "weights (ro)": "weights_bytes",
+    "activations (rw)": "activations_bytes",
+    "ram (total)": "ram_bytes",
+}
+# "TOTAL  28,490  ...  3,220" line of the FLASH (ro) / RAM (rw) summary table
+_TOTAL_RE = re.compile(r"^\s*TOTAL\s+([\d,]+)\s+[\d.]+%\s+([\d,]+)", re.MULTILINE)
+
+# (path, size, mtime_ns) -> sha256, so the binary is hashed once per version
+_fingerprints: dict = {}
+
+# (path, size, mtime_ns) -> probe result, see probe_toolchain()
+_probes: dict = {}
+_probe_lock = threading.Lock()
+
+_VERSION_RE = re.compile(r"v?(\d+\.\d+\.\d+(?:[-.]\w+)*)")
+# Target names in the help text: series ("stm32n6"), families ("stm32",
+# "stm32[xx]", "stellar-pg[xx]") and single devices ("ispu", "mlc")
+_TARGET_RE = re.compile(r"\b(stm32[a-z0-9]*(?:\[xx\])?|stellar[a-z0-9_-]*(?:\[xx\])?|ispu|mlc)")
+
+
+def _binary_key(stedgeai_path: str) -> tuple:
+    st = Path(stedgeai_path).stat()
+    return (str(stedgeai_path), st.st_size, st.st_mtime_ns)
+
+
+def toolchain_fingerprint(stedgeai_path: str) -> str:
+    """SHA-256 of the stedgeai binary, memoized per file version"""
+    key = _binary_key(stedgeai_path)
+
+    if key not in _fingerprints:
+        _fingerprints[key] = file_digest(Path(stedgeai_path))
+        logger.debug(f"🔧 Toolchain fingerprint: {_fingerprints[key][:12]}")
+
+    return _fingerprints[key]
+
+
+def probe_toolchain(stedgeai_path: str, timeout: float = 60.0) -> dict:
+    """
+    Ask the stedgeai binary what it is and what it can target
+
+    Runs `stedgeai --version` and `stedgeai generate --help` once per
+    binary version (path, size, mtime) and caches the result together
+    with the binary hash.
+
+    Returns:
+        {"version", "targets", "fingerprint", "probed_at"}; targets is
+        empty if the help text listed none (then every target is allowed)
+    """
+    key = _binary_key(stedgeai_path)
+    with _probe_lock:
+        if key in _probes:
+            return _probes[key]
+
+        def run(*args) -> str:
+            try:
+                out = subprocess.run([stedgeai_path, *args], capture_output=True, text=True, timeout=timeout)
+                return out.stdout + out.stderr
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.warning(f"⚠️ stedgeai {' '.join(args)} failed: {e}")
+                return ""
+
+        version = _VERSION_RE.search(run("--version"))
+        probe = {
+            "backend": "stedgeai",
+            "version": version.group(1) if version else None,
+            "targets": parse_help_targets(run("generate", "--help")),
+            "fingerprint": toolchain_fingerprint(stedgeai_path),
+            "probed_at": time.time(),
+        }
+        _probes[key] = probe
+
+    logger.info(f"🔧 stedgeai {probe['version']} ({probe['fingerprint'][:12]}), "
+                f"{len(probe['targets'])} targets")
+    return probe
+
+
+_TARGET_OPTION_RE = re.compile(r"(-\w+,\s*)?--target\b")
+
+
+def parse_help_targets(text: str) -> List[str]:
+    """
+    Target names listed under the --target option of `stedgeai generate --help`
+
+    Only the option's own description (its line plus the more indented
+    continuation lines) is read, so product names elsewhere in the help
+    ("STM32CubeMX") are not mistaken for targets. Families keep their
+    "[xx]" placeholder ("stm32[xx]", "stellar-pg[xx]"), see
+    target_supported() for how they are matched.
+
+    Returns:
+        Sorted names, empty if the help has no parsable --target list
+    """
+    section = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        stripped = line.lstrip()
+        if not _TARGET_OPTION_RE.match(stripped):
+            continue
+        indent = len(line) - len(stripped)
+        section.append(stripped)
+        for following in lines[i + 1:]:
+            rest = following.lstrip()
+            if not rest or rest.startswith("-") or len(following) - len(rest) <= indent:
+                break
+            section.append(rest)
+
+    return sorted(set(t.rstrip("-_") for t in _TARGET_RE.findall("\n".join(section).lower())))
+
+
+def target_supported(target: str, targets: List[str]) -> bool:
+    """
+    Whether a target is covered by the probed target list
+
+    A listed name covers itself and every series that continues it with
+    letters and digits only, so the family "stm32" (or "stm32[xx]") accepts
+    "stm32f4" and "stm32h7" accepts "stm32h747", but "stm32/.." or
+    "stellar-e-x" match nothing. An empty list accepts everything.
+    """
+    if not targets:
+        return True
+    target = target.strip().lower()
+    return any(re.fullmatch(re.escape(t.replace("[xx]", "")) + r"[a-z0-9]*", target) for t in targets)
+
+
+def cached_probe(stedgeai_path: str) -> Optional[dict]:
+    """Probe result for the current binary, None if it was not probed yet"""
+    try:
+        return _probes.get(_binary_key(stedgeai_path))
+    except FileNotFoundError:
+        return None
+
+
+def parse_analyze_report(text: str) -> dict:
+    """
+    Footprint numbers from stedgeai analyze output
+
+    Returns:
+        Dict with macc, weights_bytes, activations_bytes, ram_bytes and
+        flash_bytes / ram_total_bytes when the summary table is present.
+        Missing values are left out.
+    """
+    report = {}
+    for label, value in _SUMMARY_RE.findall(text):
+        report.setdefault(_SUMMARY_KEYS[label.lower()], int(value.replace(",", "")))
+
+    total = _TOTAL_RE.search(text)
+    if total:
+        report["flash_bytes"] = int(total.group(1).replace(",", ""))
+        report["ram_total_bytes"] = int(total.group(2).replace(",", ""))
+
+    return report
+
+
+def cli_command(
+    stedgeai_path: str,
+    action: str,
+    model_file: Path,
+    network: str,
+    target: str,
+    output_dir: Optional[Path] = None,
+    workspace_dir: Optional[Path] = None
+) -> list:
+    """stedgeai command line for generate or analyze"""
+    flags = GENERATE_FLAGS if action == "generate" else ANALYZE_FLAGS
+    cmd = [
+        stedgeai_path,
+        action,
+        "-m", str(model_file),
+        "-n", network,
+        "--target", target,
+        *flags
+    ]
+
+    # Add output directory if specified
+    if output_dir:
+        cmd.extend(["--output", str(output_dir)])
+
+    # Keep stedgeai's temp files out of the shared working directory
+    if workspace_dir:
+        cmd.extend(["--workspace", str(workspace_dir)])
+
+    return cmd
+
+
+class StedgeaiBackend(CompilerBackend):
+    """The real stedgeai CLI, run as an asyncio subprocess"""
+
+    name = "stedgeai"
+
+    def __init__(self, stedgeai_path: str):
+        self.stedgeai_path = stedgeai_path
+
+    def capabilities(self) -> dict:
+        return probe_toolchain(self.stedgeai_path)
+
+    async def run(self, action, model_file, network, target, output_dir, workspace_dir,
+                  log_file, timeout=None, on_line=None) -> RunResult:
+        cmd = cli_command(self.stedgeai_path, action, model_file, network, target, output_dir, workspace_dir)
+        logger.debug(f"🔧 Command: {' '.join(cmd)}")
+        return await run_command(cmd, log_file, timeout=timeout, on_line=on_line)
+
+
 """Contains the STEdgeAI options for easy server integration"""
 class STEdgeAI:
-    def __init__(self, model_file: Optional[Path], network: str, output_dir: Optional[Path] = None):
+    def __init__(self, model_file: Optional[Path], network: str, output_dir: Optional[Path] = None, target: str = "stm32f4", workspace_dir: Optional[Path] = None, toolchain: Optional[ToolchainConfig] = None, backend: Optional[CompilerBackend] = None):
         
-        self.stedgeai_path = self.set_stedgeai_path()
+        # With a ToolchainConfig the paths come from its cache instead of re-reading the JSON files
+        if toolchain is not None:
+            self.stedgeai_path = toolchain.stedgeai_path() if backend is None else None
+            self.stm_cast_workspace = str(toolchain.workspace_path())
+        else:
+            self.stedgeai_path = self.set_stedgeai_path() if backend is None else None
+            self.stm_cast_workspace = self.set_workspace_path() if backend is None else ""
+        # Without an explicit backend (e.g. SimulatedBackend) the real stedgeai CLI is used
+        self.backend = backend or StedgeaiBackend(self.stedgeai_path)
         self.model_file = model_file
-        self.stm_cast_workspace = self.set_workspace_path()
         self.network_name = network
         self.output_dir = output_dir
+        self.target = target
+        self.workspace_dir = workspace_dir
 
-    def generate_model(self) -> bool:
-        
-        logger.debug(f"🔧 stedgeai_path: {self.stedgeai_path}")
+    async def _run(self, action: str, log_file: Path, timeout: Optional[float], on_line=None) -> RunResult:
+        return await self.backend.run(
+            action, self.model_file, self.network_name, self.target, self.output_dir, self.workspace_dir,
+            log_file, timeout=timeout, on_line=on_line
+        )
+
+    async def generate_model(
+        self,
+        log_file: Path,
+        timeout: Optional[float] = None,
+        on_line: Optional[Callable[[str, str], None]] = None
+    ) -> RunResult:
+        """
+        Run stedgeai generate as an asyncio subprocess
+
+        Output is streamed into log_file while the compile runs; on timeout
+        or cancellation the stedgeai process tree is killed.
+        """
+        logger.debug(f"🔧 backend: {self.backend.name}, stedgeai_path: {self.stedgeai_path}")
         logger.debug(f"🔧 model_file: {self.model_file}")
         logger.debug(f"🔧 output_dir: {self.output_dir}")
-
-        cmd = [
-            self.stedgeai_path,
-            "generate",
-            "-m", str(self.model_file),
-            "-n", self.network_name,
-            "--target", "stm32f4",
-            "--allocate-inputs",
-            "allocate-outputs"
-        ]
-        
-        # Add output directory if specified
-        if self.output_dir:
-            cmd.extend(["--output", str(self.output_dir)])
-        
-        logger.debug(f"🔧 Command: {' '.join(cmd)}")
     
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = await self._run("generate", log_file, timeout, on_line)
         
-        if result.stdout:
-            logger.debug(f"STDOUT:\n{result.stdout}")
-        if result.stderr:
-            logger.error(f"STDERR:\n{result.stderr}")
+        if not result.ok:
+            logger.error(f"❌ stedgeai exit code {result.returncode}, see {log_file}")
     
-        return result.returncode == 0
+        return result
+
+    async def analyze_model(self, log_file: Path, timeout: Optional[float] = None) -> RunResult:
+        """
+        Run stedgeai analyze as an asyncio subprocess
+
+        Only reports the footprint (RAM, flash, MACC), no code is generated.
+        Use analyze_report() afterwards to read the parsed numbers.
+        """
+        result = await self._run("analyze", log_file, timeout)
+
+        if not result.ok:
+            logger.error(f"❌ stedgeai analyze exit code {result.returncode}, see {log_file}")
+
+        return result
+
+    def analyze_report(self, log_file: Path) -> dict:
+        """
+        Parsed footprint of the last analyze run
+
+        Reads <network>_analyze_report.txt from output_dir, or the captured
+        console output if stedgeai did not write a report file.
+        """
+        report_file = Path(self.output_dir or ".") / f"{self.network_name}_analyze_report.txt"
+        if report_file.is_file():
+            text = report_file.read_text(errors="replace")
+        else:
+            text = "\n".join(
+                line.split("] ", 1)[-1]
+                for line in log_file.read_text(errors="replace").splitlines()
+            )
+        return parse_analyze_report(text)
+
+    def capabilities(self) -> dict:
+        return self.backend.capabilities()
+
+    def collect_artifacts(self, since: float = 0.0) -> list:
+        """Files for this network in output_dir written at or after `since`"""
+        if not self.output_dir or not Path(self.output_dir).is_dir():
+            return []
+
+        name = self.network_name
+        return sorted(
+            f for f in Path(self.output_dir).glob(f"{name}*")
+            if f.is_file()
+            and (f.stem == name or f.name.startswith(f"{name}_"))
+            and f.stat().st_mtime >= since
+        )
 
     def set_stedgeai_path(self) -> str:
         #get stedgeapi path
@@ -69,12 +345,3 @@ class STEdgeAI:
             workspace_path = config.get("path", "").strip()
 
         return workspace_path
-
-
-def set_workspace_path() -> Path:
-    """Module-level helper: returns the workspace path from BSC.json as a Path."""
-    with open(CONFIG_DIR/"BSC.json", "r") as f:
-        config = json.load(f)
-        workspace_path = config.get("path", "").strip()
-
-    return Path(workspace_path)
\ No newline at end of file
@@ -0,0 +1,246 @@
+import logging
+import mmap
+import struct
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+FILE_IDENTIFIER = b"TFL3"
+SCHEMA_VERSION = 3
+
+# Bumped whenever a model rejected before could now pass (stored rejections are per version)
+VALIDATOR_VERSION = 2
+
+# schema.fbs TensorType (codes beyond this list are reported as TYPE_<n>)
+TENSOR_TYPES = [
+    "FLOAT32", "FLOAT16", "INT32", "UINT8", "INT64", "STRING", "BOOL", "INT16",
+    "COMPLEX64", "INT8", "FLOAT64", "COMPLEX128", "UINT64", "RESOURCE", "VARIANT",
+    "UINT32", "UINT16", "INT4", "BFLOAT16",
+]
+
+# schema.fbs BuiltinOperator (codes beyond this list are reported as BUILTIN_<n>)
+BUILTIN_OPERATORS = [
+    "ADD", "AVERAGE_POOL_2D", "CONCATENATION", "CONV_2D", "DEPTHWISE_CONV_2D",
+    "DEPTH_TO_SPACE", "DEQUANTIZE", "EMBEDDING_LOOKUP", "FLOOR", "FULLY_CONNECTED",
+    "HASHTABLE_LOOKUP", "L2_NORMALIZATION", "L2_POOL_2D", "LOCAL_RESPONSE_NORMALIZATION",
+    "LOGISTIC", "LSH_PROJECTION", "LSTM", "MAX_POOL_2D", "MUL", "RELU", "RELU_N1_TO_1",
+    "RELU6", "RESHAPE", "RESIZE_BILINEAR", "RNN", "SOFTMAX", "SPACE_TO_DEPTH", "SVDF",
+    "TANH", "CONCAT_EMBEDDINGS", "SKIP_GRAM", "CALL", "CUSTOM", "EMBEDDING_LOOKUP_SPARSE",
+    "PAD", "UNIDIRECTIONAL_SEQUENCE_RNN", "GATHER", "BATCH_TO_SPACE_ND",
+    "SPACE_TO_BATCH_ND", "TRANSPOSE", "MEAN", "SUB", "DIV", "SQUEEZE",
+    "UNIDIRECTIONAL_SEQUENCE_LSTM", "STRIDED_SLICE", "BIDIRECTIONAL_SEQUENCE_RNN", "EXP",
+    "TOPK_V2", "SPLIT", "LOG_SOFTMAX", "DELEGATE", "BIDIRECTIONAL_SEQUENCE_LSTM", "CAST",
+    "PRELU", "MAXIMUM", "ARG_MAX", "MINIMUM", "LESS", "NEG", "PADV2", "GREATER",
+    "GREATER_EQUAL", "LESS_EQUAL", "SELECT", "SLICE", "SIN", "TRANSPOSE_CONV",
+    "SPARSE_TO_DENSE", "TILE", "EXPAND_DIMS", "EQUAL", "NOT_EQUAL", "LOG", "SUM", "SQRT",
+    "RSQRT", "SHAPE", "POW", "ARG_MIN", "FAKE_QUANT", "REDUCE_PROD", "REDUCE_MAX", "PACK",
+    "LOGICAL_OR", "ONE_HOT", "LOGICAL_AND", "LOGICAL_NOT", "UNPACK", "REDUCE_MIN",
+    "FLOOR_DIV", "REDUCE_ANY", "SQUARE", "ZEROS_LIKE", "FILL", "FLOOR_MOD", "RANGE",
+    "RESIZE_NEAREST_NEIGHBOR", "LEAKY_RELU", "SQUARED_DIFFERENCE", "MIRROR_PAD", "ABS",
+    "SPLIT_V", "UNIQUE", "CEIL", "REVERSE_V2", "ADD_N", "GATHER_ND", "COS", "WHERE", "RANK",
+    "ELU", "REVERSE_SEQUENCE", "MATRIX_DIAG", "QUANTIZE", "MATRIX_SET_DIAG", "ROUND",
+    "HARD_SWISH", "IF", "WHILE", "NON_MAX_SUPPRESSION_V4", "NON_MAX_SUPPRESSION_V5",
+    "SCATTER_ND", "SELECT_V2", "DENSIFY", "SEGMENT_SUM", "BATCH_MATMUL",
+]
+CUSTOM = BUILTIN_OPERATORS.index("CUSTOM")
+
+
+class TFLiteError(ValueError):
+    """The file is not a usable TFLite model"""
+
+
+class _Table(object):
+    """Read-only view of one flatbuffer table, every access bounds checked"""
+
+    def __init__(self, buf, pos: int):
+        self.buf = buf
+        self.pos = pos
+        vtable = pos - self._read("<i", pos)
+        self._vtable = vtable
+        self._vtable_size = self._read("<H", vtable)
+
+    def _read(self, fmt: str, pos: int):
+        size = struct.calcsize(fmt)
+        if pos < 0 or pos + size > len(self.buf):
+            raise TFLiteError(f"Truncated or corrupt flatbuffer (offset {pos})")
+        return struct.unpack_from(fmt, self.buf, pos)[0]
+
+    def _field(self, index: int) -> Optional[int]:
+        entry = 4 + 2 * index
+        if entry >= self._vtable_size:
+            return None
+        offset = self._read("<H", self._vtable + entry)
+        return self.pos + offset if offset else None
+
+    def _deref(self, pos: int) -> int:
+        return pos + self._read("<I", pos)
+
+    def scalar(self, index: int, fmt: str, default=0):
+        pos = self._field(index)
+        return default if pos is None else self._read(fmt, pos)
+
+    def string(self, index: int) -> Optional[str]:
+        pos = self._field(index)
+        if pos is None:
+            return None
+        start = self._deref(pos)
+        length = self._read("<I", start)
+        if start + 4 + length > len(self.buf):
+            raise TFLiteError("String runs past end of file")
+        return bytes(self.buf[start + 4:start + 4 + length]).decode("utf-8", "replace")
+
+    def _vector(self, index: int, item_size: int):
+        pos = self._field(index)
+        if pos is None:
+            return 0, 0
+        start = self._deref(pos)
+        length = self._read("<I", start)
+        if start + 4 + length * item_size > len(self.buf):
+            raise TFLiteError("Vector runs past end of file")
+        return start + 4, length
+
+    def ints(self, index: int, fmt: str = "<i") -> List[int]:
+        size = struct.calcsize(fmt)
+        start, length = self._vector(index, size)
+        return [self._read(fmt, start + i * size) for i in range(length)]
+
+    def tables(self, index: int) -> List["_Table"]:
+        start, length = self._vector(index, 4)
+        return [_Table(self.buf, self._deref(start + i * 4)) for i in range(length)]
+
+    def count(self, index: int) -> int:
+        return self._vector(index, 4)[1]
+
+
+def _operator_name(code: _Table) -> str:
+    # OperatorCode: 0 deprecated_builtin_code (int8), 1 custom_code, 3 builtin_code (int32)
+    builtin = max(code.scalar(0, "<b"), code.scalar(3, "<i"))
+    if builtin == CUSTOM:
+        return f"CUSTOM:{code.string(1) or '?'}"
+    if 0 <= builtin < len(BUILTIN_OPERATORS):
+        return BUILTIN_OPERATORS[builtin]
+    return f"BUILTIN_{builtin}"
+
+
+def _tensor_info(tensor: _Table) -> dict:
+    # Tensor: 0 shape, 1 type, 3 name
+    type_id = tensor.scalar(1, "<b")
+    return {
+        "name": tensor.string(3),
+        "shape": tensor.ints(0),
+        "type": TENSOR_TYPES[type_id] if 0 <= type_id < len(TENSOR_TYPES) else f"TYPE_{type_id}",
+    }
+
+
+def parse_model(buf) -> dict:
+    """
+    Check the structure of a TFLite flatbuffer and describe it
+
+    Checks the file identifier and schema version, that every subgraph
+    has inputs and outputs, and that all tensor, buffer and operator
+    code indices point inside their tables.
+
+    Args:
+        buf: bytes, memoryview or mmap of the whole file
+
+    Returns:
+        Metadata (operators, tensor types, input/output shapes)
+
+    Raises:
+        TFLiteError: If the file is not a valid model
+    """
+    if len(buf) < 8:
+        raise TFLiteError(f"File too small for a TFLite model ({len(buf)} bytes)")
+    if bytes(buf[4:8]) != FILE_IDENTIFIER:
+        raise TFLiteError(f"Missing TFL3 file identifier (got {bytes(buf[4:8])!r})")
+
+    # Model: 0 version, 1 operator_codes, 2 subgraphs, 3 description, 4 buffers
+    model = _Table(buf, struct.unpack_from("<I", buf, 0)[0])
+    version = model.scalar(0, "<I")
+    if version != SCHEMA_VERSION:
+        raise TFLiteError(f"Unsupported schema version {version}")
+
+    op_names = [_operator_name(code) for code in model.tables(1)]
+    buffers = model.tables(4)
+    subgraphs = model.tables(2)
+    if not subgraphs:
+        raise TFLiteError("Model has no subgraphs")
+
+    # Buffer: 1 offset, 2 size (models > 2 GB keep data outside the flatbuffer)
+    for i, buffer in enumerate(buffers):
+        offset, size = buffer.scalar(1, "<Q"), buffer.scalar(2, "<Q")
+        if offset and offset + size > len(buf):
+            raise TFLiteError(f"Buffer {i} runs past end of file (truncated upload?)")
+
+    used_ops = set()
+    tensor_types = set()
+    operator_count = 0
+    tensor_count = 0
+    main = None
+
+    # SubGraph: 0 tensors, 1 inputs, 2 outputs, 3 operators
+    for s, subgraph in enumerate(subgraphs):
+        tensors = subgraph.tables(0)
+        infos = [_tensor_info(t) for t in tensors]
+        for t, tensor in enumerate(tensors):
+            if tensor.scalar(2, "<I") >= max(len(buffers), 1):
+                raise TFLiteError(f"Tensor {t} of subgraph {s} references a missing buffer")
+
+        inputs, outputs = subgraph.ints(1), subgraph.ints(2)
+        if not inputs or not outputs:
+            raise TFLiteError(f"Subgraph {s} has no inputs or outputs")
+        for index in inputs + outputs:
+            if not 0 <= index < len(tensors):
+                raise TFLiteError(f"Subgraph {s} references missing tensor {index}")
+
+        for operator in subgraph.tables(3):
+            opcode = operator.scalar(0, "<I")
+            if opcode >= len(op_names):
+                raise TFLiteError(f"Subgraph {s} uses missing operator code {opcode}")
+            used_ops.add(op_names[opcode])
+            operator_count += 1
+
+        tensor_types.update(info["type"] for info in infos)
+        tensor_count += len(tensors)
+        if main is None:
+            main = {
+                "inputs": [infos[i] for i in inputs],
+                "outputs": [infos[i] for i in outputs],
+            }
+
+    return {
+        "schema_version": version,
+        "description": model.string(3),
+        "subgraphs": len(subgraphs),
+        "operators": sorted(used_ops),
+        "operator_count": operator_count,
+        "custom_operators": sorted(op for op in used_ops if op.startswith("CUSTOM:")),
+        "tensor_count": tensor_count,
+        "tensor_types": sorted(tensor_types),
+        "buffers": len(buffers),
+        **main,
+    }
+
+
+def inspect_tflite(path: Path) -> dict:
+    """
+    Validate a .tflite file without reading it into memory
+
+    The file is memory-mapped, so only the pages holding the flatbuffer
+    tables are touched, not the weights.
+
+    Raises:
+        TFLiteError: If the file is not a valid model
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise TFLiteError("Empty file")
+        try:
+            return parse_model(mm)
+        except (struct.error, RecursionError) as e:
+            raise TFLiteError(f"Corrupt flatbuffer: {e}")
+        finally:
+            mm.close()
@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ToolchainConfig(object):
+    """Cached view of config/stedgeai_exe.json and config/BSC.json
+
+    Both files are parsed once and the resolved paths kept in memory.
+    Each lookup only stats the two JSON files and reloads them when an
+    mtime changed (e.g. after the FilesystemFinder threads wrote a newly
+    found path), so the generate hot path does no JSON parsing.
+
+    on_reload is called with the resolved stedgeai path (None if unusable)
+    after every (re)load, e.g. to probe a new binary.
+
+    Usage:
+        toolchain = ToolchainConfig(CONFIG_DIR, on_reload=probe)
+        exe = toolchain.stedgeai_path()       # FileNotFoundError if unusable
+        bsc = toolchain.workspace_path()
+        toolchain.state()                     # for GET /toolchain
+    """
+
+    def __init__(self, config_dir: Path, on_reload: Optional[Callable[[Optional[str]], None]] = None):
+        self.stedgeai_file = config_dir / "stedgeai_exe.json"
+        self.workspace_file = config_dir / "BSC.json"
+        self.on_reload = on_reload
+
+        self._lock = threading.Lock()
+        self._mtimes: Optional[Tuple] = None
+        self._stedgeai: str = ""
+        self._stedgeai_ok = False
+        self._workspace: str = ""
+        self._errors: dict = {}
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def stedgeai_path(self) -> str:
+        """
+        Path of the stedgeai executable
+
+        Raises:
+            FileNotFoundError: If not configured or the file does not exist
+        """
+        self._refresh()
+        if not self._stedgeai_ok:
+            logger.error(f"❌ stedgeai.exe not found at: {self._stedgeai}")
+            raise FileNotFoundError(f"stedgeai.exe not found at: {self._stedgeai}")
+        return self._stedgeai
+
+    def workspace_path(self) -> Path:
+        """BSC project folder (empty path if not configured)"""
+        self._refresh()
+        return Path(self._workspace)
+
+    def state(self) -> dict:
+        self._refresh()
+        return {
+            "stedgeai_path": self._stedgeai or None,
+            "stedgeai_found": self._stedgeai_ok,
+            "workspace_path": self._workspace or None,
+            "config_files": {
+                str(self.stedgeai_file): self._mtimes[0] / 1e9 if self._mtimes[0] else None,
+                str(self.workspace_file): self._mtimes[1] / 1e9 if self._mtimes[1] else None,
+            },
+            "errors": self._errors,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        mtimes = (self._mtime(self.stedgeai_file), self._mtime(self.workspace_file))
+        if mtimes == self._mtimes:
+            return
+
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            errors = {}
+            stedgeai = self._read_path(self.stedgeai_file, errors)
+            workspace = self._read_path(self.workspace_file, errors)
+
+            self._stedgeai = stedgeai
+            self._stedgeai_ok = bool(stedgeai) and Path(stedgeai).exists()
+            self._workspace = workspace
+            self._errors = errors
+            self._mtimes = mtimes
+            self.loaded_at = time.time()
+            self.reloads += 1
+
+        logger.info(f"🔧 Toolchain config loaded: stedgeai={stedgeai or '-'} "
+                    f"({'found' if self._stedgeai_ok else 'missing'}), workspace={workspace or '-'}")
+        if self.on_reload is not None:
+            self.on_reload(stedgeai if self._stedgeai_ok else None)
+
+    @staticmethod
+    def _read_path(config_file: Path, errors: dict) -> str:
+        """The "path" entry of a finder config file, "" if unavailable"""
+        try:
+            return json.loads(config_file.read_text()).get("path", "").strip()
+        except FileNotFoundError:
+            errors[config_file.name] = "missing"
+        except Exception as e:
+            errors[config_file.name] = str(e)
+        return ""
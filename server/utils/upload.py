@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredUpload:
+    """Result of a streamed upload"""
+    path: Path
+    size: int
+    sha256: str
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Strip directory components from a client supplied filename"""
+    name = Path(filename or "").name
+    if not name or name in (".", ".."):
+        raise HTTPException(status_code=400, detail=f"Invalid filename: {filename!r}")
+    return name
+
+
+def _open_temp(tmp_dir: Path) -> BinaryIO:
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=tmp_dir, suffix=".part", delete=False)
+
+
+def _write_chunk(fh: BinaryIO, hasher, chunk: bytes):
+    hasher.update(chunk)
+    fh.write(chunk)
+
+
+def _discard(fh: BinaryIO):
+    fh.close()
+    Path(fh.name).unlink(missing_ok=True)
+
+
+class _PartEvents(object):
+    """Callbacks for the multipart parser, collecting what one write() produced"""
+
+    def __init__(self):
+        self.events: List[Tuple[str, object]] = []
+        self._field = b""
+        self._value = b""
+        self._headers: Dict[bytes, bytes] = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def drain(self) -> List[Tuple[str, object]]:
+        events, self.events = self.events, []
+        return events
+
+    def _part_begin(self):
+        self._headers = {}
+
+    def _header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def _headers_finished(self):
+        self.events.append(("part", self._headers))
+
+    def _part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", data[start:end]))
+
+    def _part_end(self):
+        self.events.append(("end", None))
+
+
+async def stream_multipart(
+    request: Request,
+    field: str,
+    tmp_dir: Path,
+    max_size: int,
+    chunk_size: int
+) -> Tuple[str, StoredUpload]:
+    """
+    Stream one file field of a multipart/form-data body into a temp file
+
+    The body is parsed as it arrives from the network (nothing is spooled
+    first), each piece is hashed and written straight away, and the upload
+    is aborted with 413 as soon as more than max_size bytes arrived.
+    Hashing and disk writes run in the threadpool; at most chunk_size
+    bytes are buffered in memory.
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        field: Form field holding the file
+        tmp_dir: Directory for the partial file
+        max_size: Abort with 413 once more bytes than this arrive
+        chunk_size: Bytes buffered per disk write
+
+    Returns:
+        (client filename, StoredUpload pointing at the still temporary file)
+
+    Raises:
+        HTTPException: 400 for a malformed body or missing field, 413 if too large
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    collector = _PartEvents()
+    parser = multipart.MultipartParser(options[b"boundary"], collector.callbacks())
+    hasher = hashlib.sha256()
+    size = 0
+    filename = None
+    fh = None
+    in_file = False
+    buffer = bytearray()
+
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except multipart.exceptions.MultipartParseError as e:
+                raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+
+            for kind, value in collector.drain():
+                if kind == "part" and fh is None:
+                    _, disposition = parse_options_header(value.get(b"content-disposition", b""))
+                    if disposition.get(b"name", b"").decode(errors="replace") == field:
+                        filename = disposition.get(b"filename", b"").decode(errors="replace")
+                        fh = await run_in_threadpool(_open_temp, tmp_dir)
+                        in_file = True
+                elif kind == "data" and in_file:
+                    size += len(value)
+                    if size > max_size:
+                        logger.error(f"❌ Upload exceeds limit of {max_size} bytes")
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large (limit {max_size} bytes)"
+                        )
+                    buffer += value
+                elif kind == "end":
+                    in_file = False
+
+            if fh is not None and (len(buffer) >= chunk_size or not in_file) and buffer:
+                await run_in_threadpool(_write_chunk, fh, hasher, bytes(buffer))
+                buffer.clear()
+
+        parser.finalize()
+        if fh is None:
+            raise HTTPException(status_code=400, detail=f"Missing form field '{field}'")
+        if buffer:
+            await run_in_threadpool(_write_chunk, fh, hasher, bytes(buffer))
+        await run_in_threadpool(fh.close)
+    except BaseException:
+        if fh is not None:
+            await run_in_threadpool(_discard, fh)
+        raise
+
+    logger.debug(f"🔵 Streamed {size} bytes to {fh.name}")
+    return filename, StoredUpload(path=Path(fh.name), size=size, sha256=hasher.hexdigest())
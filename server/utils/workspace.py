@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from utils.encoding import precompress
+
+logger = logging.getLogger(__name__)
+
+# Serializes writes into the shared BSC project folder
+_project_lock = threading.Lock()
+
+# One lock per published output directory, so concurrent publishes to the
+# same folder (same network, different targets) swap one after the other
+_publish_locks: Dict[Path, threading.Lock] = {}
+_publish_locks_guard = threading.Lock()
+
+
+def _publish_lock(dest: Path) -> threading.Lock:
+    with _publish_locks_guard:
+        return _publish_locks.setdefault(dest.resolve(), threading.Lock())
+
+
+def wait_for_publish(dest: Path):
+    """Block while dest is being swapped (readers call this after a miss)"""
+    with _publish_locks_guard:
+        lock = _publish_locks.get(dest.resolve())
+    if lock is not None:
+        with lock:
+            pass
+
+
+class WorkspacePool(object):
+    """Fixed set of isolated scratch folders for stedgeai runs
+
+    Every running job borrows one slot, so parallel compiles never
+    write into the same folder. A slot is wiped before it is handed out.
+
+    Layout:
+        root/slot_0/output/   stedgeai --output
+        root/slot_0/ws/       stedgeai --workspace
+        root/slot_1/...
+
+    Usage:
+        pool = WorkspacePool(Path("./workspaces"), size=4)
+        async with pool.acquire() as slot:
+            ...  # run stedgeai with output_dir=slot / "output"
+    """
+
+    def __init__(self, root: Path, size: int):
+        self.root = root
+        self.size = max(1, size)
+        self._free: asyncio.Queue = asyncio.Queue()
+
+        for i in range(self.size):
+            slot = root / f"slot_{i}"
+            slot.mkdir(parents=True, exist_ok=True)
+            self._free.put_nowait(slot)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Path]:
+        slot = await self._free.get()
+        try:
+            await asyncio.to_thread(self._reset, slot)
+            logger.debug(f"🔧 Acquired workspace {slot.name}")
+            yield slot
+        finally:
+            self._free.put_nowait(slot)
+            logger.debug(f"🔧 Released workspace {slot.name}")
+
+    def available(self) -> int:
+        return self._free.qsize()
+
+    @staticmethod
+    def _reset(slot: Path):
+        shutil.rmtree(slot, ignore_errors=True)
+        (slot / "output").mkdir(parents=True)
+        (slot / "ws").mkdir(parents=True)
+
+
+def publish_dir(files: List[Path], dest: Path):
+    """
+    Replace dest with a directory holding exactly `files`
+
+    Files are staged in a sibling temp folder and swapped in with
+    renames, so readers never see a half-written output directory; the
+    swap holds a per-destination lock (dest is briefly missing in between,
+    see wait_for_publish). Compressed download variants are written while
+    staging.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    token = uuid.uuid4().hex[:8]
+    staging = dest.parent / f".{dest.name}.{token}.tmp"
+    old = dest.parent / f".{dest.name}.{token}.old"
+
+    staging.mkdir()
+    for f in files:
+        shutil.copy2(f, staging / f.name)
+    precompress(staging)
+
+    # os.replace cannot overwrite a directory on Windows, move the old one aside
+    with _publish_lock(dest):
+        if dest.exists():
+            os.replace(dest, old)
+        os.replace(staging, dest)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def publish_artifacts(files: List[Path], output_dir: Path, project_dir: Optional[Path] = None):
+    """
+    Publish a finished build
+
+    Args:
+        files: Generated artifacts (from a workspace slot or the compile cache)
+        output_dir: OUTPUT_DIR/<nn_name>, replaced atomically
+        project_dir: Optional X-CUBE-AI/App folder of the BSC project
+    """
+    publish_dir(files, output_dir)
+    logger.info(f"📦 Published {len(files)} files to {output_dir}")
+
+    if project_dir is None:
+        return
+
+    with _project_lock:
+        project_dir.mkdir(parents=True, exist_ok=True)
+        for f in files:
+            tmp = project_dir / f".{f.name}.tmp"
+            shutil.copy2(f, tmp)
+            os.replace(tmp, project_dir / f.name)
+
+    logger.info(f"📦 Updated project folder {project_dir}")
@@ -0,0 +1,53 @@
+"""Admission control of generate jobs"""
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    monkeypatch.syspath_prepend(str(SERVER_DIR))
+    from utils import admission
+    return admission
+
+
+@pytest.fixture
+def control(admission):
+    from utils.jobs import JobQueue
+
+    async def handler(job):
+        return {}
+
+    queue = JobQueue(handler=handler, workers=2, key=lambda p: p["digest"])
+    return admission.AdmissionControl(queue, max_pending=100, per_client=8)
+
+
+def batch(n):
+    return [{"digest": f"{i:064x}", "client": "10.0.0.7"} for i in range(n)]
+
+
+def test_batch_larger_than_client_budget_is_admitted_partially(control):
+    params = batch(9)
+
+    refused, why = control.admit("10.0.0.7", params, partial=True)
+
+    assert refused == params[8:]
+    assert why.retry_after >= 1
+    assert control.admitted == 8
+
+
+def test_repeated_models_in_a_batch_count_once(control):
+    params = batch(8) + batch(8)
+
+    refused, why = control.admit("10.0.0.7", params, partial=True)
+
+    assert (refused, why) == ([], None)
+
+
+def test_single_request_over_the_budget_can_never_fit(admission, control):
+    with pytest.raises(admission.Overloaded) as e:
+        control.admit("10.0.0.7", batch(9))
+
+    assert e.value.retry_after is None
@@ -0,0 +1,61 @@
+"""Keyset pagination of SQLite listings"""
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
+COLUMNS = {"name": "name", "mtime": "mtime", "size": "size"}
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    monkeypatch.syspath_prepend(str(SERVER_DIR))
+    from utils import listing
+    return listing
+
+
+@pytest.fixture
+def table():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE files (name TEXT PRIMARY KEY, size INTEGER, mtime REAL)")
+    conn.executemany(
+        "INSERT INTO files VALUES (?, ?, ?)",
+        [(f"{'ab'[i % 2]}{i:02d}", i % 5, 1000.0 + i % 3) for i in range(25)]
+    )
+    return conn, threading.Lock()
+
+
+def walk(listing, table, **query):
+    conn, lock = table
+    names, cursor = [], None
+    while True:
+        page = listing.keyset_page(conn, lock, "files", COLUMNS, dict, cursor=cursor, limit=4, **query)
+        names += [item["name"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names, page["total"]
+
+
+@pytest.mark.parametrize("sort", ["name", "mtime", "size"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_the_sorted_table(listing, table, sort, order):
+    rows = [dict(r) for r in table[0].execute("SELECT * FROM files WHERE name LIKE 'a%'")]
+    expected = [r["name"] for r in sorted(rows, key=lambda r: (r[sort], r["name"]), reverse=order == "desc")]
+
+    names, total = walk(listing, table, sort=sort, order=order, prefix="a")
+
+    assert names == expected
+    assert total == len(expected)
+
+
+def test_cursor_of_another_sort_is_rejected(listing, table):
+    conn, lock = table
+    cursor = listing.keyset_page(conn, lock, "files", COLUMNS, dict, sort="size", limit=4)["next_cursor"]
+
+    with pytest.raises(listing.HTTPException) as e:
+        listing.keyset_page(conn, lock, "files", COLUMNS, dict, sort="name", cursor=cursor, limit=4)
+
+    assert e.value.status_code == 400
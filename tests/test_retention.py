@@ -0,0 +1,61 @@
+"""Persisted last-use times of the retention GC"""
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
+
+
+@pytest.fixture
+def retention(monkeypatch):
+    monkeypatch.syspath_prepend(str(SERVER_DIR))
+    from utils import retention
+    return retention
+
+
+@pytest.fixture
+def clock(retention, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(retention.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def gc(retention, tmp_path):
+    from utils.catalog import ArtifactCatalog
+    from utils.model_store import ModelStore
+
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    catalog = ArtifactCatalog(tmp_path / "catalog.sqlite3", outputs)
+    return retention.RetentionGC(
+        ModelStore(tmp_path / "uploads"), catalog,
+        upload_max_bytes=1 << 30, output_max_bytes=1 << 30, max_age=3600, in_use=set
+    )
+
+
+def test_frequently_used_output_keeps_persisting(retention, gc, clock):
+    output = gc.catalog.root / "net"
+    output.mkdir()
+    start = clock[0]
+
+    # Used every 30 s, well inside PERSIST_INTERVAL each time
+    for _ in range(10):
+        gc.touch(output)
+        clock[0] += 30
+
+    last_touch = clock[0] - 30
+    assert gc.catalog.usage()["net"] > start
+    assert last_touch - gc.catalog.usage()["net"] < retention.PERSIST_INTERVAL
+
+
+def test_frequently_used_blob_keeps_persisting(retention, gc, clock):
+    blob = gc.store.blob_dir / f"{'0' * 64}.tflite"
+    blob.write_bytes(b"model")
+
+    for _ in range(10):
+        gc.touch(blob)
+        clock[0] += 30
+
+    last_touch = clock[0] - 30
+    assert last_touch - blob.stat().st_mtime < retention.PERSIST_INTERVAL
@@ -0,0 +1,70 @@
+"""Parsing of `stedgeai generate --help` for the toolchain probe"""
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
+
+# `stedgeai generate --help` of ST Edge AI Core 2.x (abridged, options unrelated to --target cut)
+GENERATE_HELP = """\
+usage: stedgeai generate --model FILE --target STR [--workspace DIR] [--output DIR]
+                         [--name STR] [--compression none|lossless|low|medium|high]
+                         [--allocate-inputs] [--allocate-outputs] [--help]
+
+ST Edge AI Core v2.0.0-20049
+Generate the specialized C-files for the STM32Cube.AI runtime (X-CUBE-AI / STM32CubeMX)
+
+options:
+  -m FILE, --model FILE
+                        paths of the original model files
+  --target STR          target/device selector: stm32[xx], stellar-e,
+                        stellar-pg[xx], ispu, mlc (default: stm32)
+  -w DIR, --workspace DIR
+                        workspace folder to use (default: st_ai_ws)
+  -o DIR, --output DIR  folder where the generated files are saved (default: st_ai_output)
+  -h, --help            show this help message and exit
+"""
+
+
+@pytest.fixture
+def stedgeai(tmp_path, monkeypatch):
+    # config creates its folders relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(SERVER_DIR))
+    from utils import stedgeai
+    return stedgeai
+
+
+def test_parse_help_targets_reads_only_the_target_option(stedgeai):
+    targets = stedgeai.parse_help_targets(GENERATE_HELP)
+    assert targets == ["ispu", "mlc", "stellar-e", "stellar-pg[xx]", "stm32", "stm32[xx]"]
+
+
+def test_families_cover_their_series(stedgeai):
+    targets = stedgeai.parse_help_targets(GENERATE_HELP)
+    for target in ("stm32", "stm32f4", "STM32H7", "stm32n6", "stellar-pg5", "ispu"):
+        assert stedgeai.target_supported(target, targets), target
+    for target in ("esp32", "stellar-x", "nrf52"):
+        assert not stedgeai.target_supported(target, targets), target
+
+
+def test_explicit_series_list(stedgeai):
+    targets = stedgeai.parse_help_targets("  --target TARGET  one of stm32f4, stm32h7, stm32n6\n")
+    assert targets == ["stm32f4", "stm32h7", "stm32n6"]
+    assert stedgeai.target_supported("stm32h747", targets)
+    assert not stedgeai.target_supported("stm32g4", targets)
+
+
+def test_no_target_list_accepts_everything(stedgeai):
+    assert stedgeai.parse_help_targets("usage: stedgeai generate --model FILE\n") == []
+    assert stedgeai.target_supported("stm32f4", [])
+
+
+def test_target_supported_matches_series_not_arbitrary_suffixes(stedgeai):
+    targets = ["stellar-e", "stm32[xx]", "stm32h7"]
+
+    assert stedgeai.target_supported("stm32f4", targets)
+    assert stedgeai.target_supported("stm32h747", targets)
+    assert stedgeai.target_supported("stellar-e", targets)
+    assert not stedgeai.target_supported("stm32/../../../escape", targets)
+    assert not stedgeai.target_supported("stellar-e-x", targets)